@@ -25,7 +25,7 @@ from .case_study import get_google_baseline_inputs, load_case_study
 def build_recommendations(
     case_study: str | None = None,
     **kwargs: Any,
-) -> list[Recommendation]:
+) -> tuple[Recommendation, ...]:
     """Build recommendations.
 
     When `case_study` is provided (e.g. "google"), the engine will use the
@@ -39,7 +39,8 @@ def build_recommendations(
         kwargs: Same keyword arguments as the original build_recommendations.
 
     Returns:
-        A list of Recommendation objects (same shape as the legacy rules engine).
+        A tuple of Recommendation objects (same shape as the legacy rules engine).
+        The tuple is shared between calls, so treat it as read-only.
     """
 
     if case_study is not None:
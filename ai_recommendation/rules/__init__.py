@@ -2,6 +2,21 @@
 Rule modules for different recommendation categories.
 """
 
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the fleet-wide batch helpers
+    np = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # optional: the batch path falls back to plain NumPy
+    njit = None
+
 from .cooling_rules import get_cooling_recommendations
 from .it_rules import get_it_recommendations
 from .power_rules import get_power_recommendations
@@ -11,90 +26,299 @@ __all__ = [
     "get_it_recommendations",
     "get_power_recommendations",
     "build_recommendations",
+    "build_recommendations_batch",
+    "recommendations_from_mask",
+    "fleet_savings",
+    "rule_hit_rates",
+    "rules_by_hit_rate",
 ]
 
-from dataclasses import dataclass
-from typing import List
-
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Recommendation:
     title: str
     reason: str
     estimated_saving_pct: float
 
 
+# Rules in evaluation order as (rule id, threshold). Rule i reads input i of
+# build_recommendations() and triggers when that input is below its threshold;
+# the aisle containment flag is normalized with bool() first, so it triggers
+# exactly when the flag is falsy (``not has_aisle_containment``).
+# Bit i of the dispatch mask and column i of the batch mask follow this order.
+_RULE_TABLE: Tuple[Tuple[str, float], ...] = (
+    ("consolidation", 30.0),
+    ("cooling_setpoint", 22.0),
+    ("aisle_containment", 1.0),
+    ("virtualization", 60.0),
+)
+_RULE_IDS: Tuple[str, ...] = tuple(rule_id for rule_id, _ in _RULE_TABLE)
+_THRESHOLDS: Tuple[float, ...] = tuple(threshold for _, threshold in _RULE_TABLE)
+_DEFAULT_ID = "best_practices"
+
+_SAVINGS: Dict[str, float] = {
+    "consolidation": 8.0,
+    "cooling_setpoint": 6.0,
+    "aisle_containment": 5.0,
+    "virtualization": 7.0,
+    "best_practices": 0.0,
+}
+
+# (title, reason) per rule id and language.
+_TRANSLATIONS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "en": {
+        "consolidation": (
+            "Server consolidation",
+            "Low CPU utilization. Consolidation reduces the server fleet and"
+            " avoids idle energy losses.",
+        ),
+        "cooling_setpoint": (
+            "Optimize cooling setpoint",
+            "Current temperature is low. Raising the setpoint can reduce"
+            " cooling consumption.",
+        ),
+        "aisle_containment": (
+            "Add hot/cold aisle containment",
+            "Lack of containment increases losses. Aisle containment improves"
+            " cooling efficiency.",
+        ),
+        "virtualization": (
+            "Increase virtualization",
+            "Low virtualization level. More logical consolidation reduces"
+            " the number of physical servers.",
+        ),
+        "best_practices": (
+            "Maintain best practices",
+            "Indicators look optimized. Keep continuous monitoring.",
+        ),
+    },
+    "fr": {
+        "consolidation": (
+            "Consolidation des serveurs",
+            "Faible taux d'utilisation CPU. Consolider permet de reduire le parc"
+            " et les pertes d'energie.",
+        ),
+        "cooling_setpoint": (
+            "Optimisation du point de consigne de refroidissement",
+            "La temperature est basse. Un setpoint plus eleve peut reduire la"
+            " consommation de refroidissement.",
+        ),
+        "aisle_containment": (
+            "Mise en place d'allee chaude/froide",
+            "L'absence de confinement augmente les pertes. L'ajout d'allee"
+            " chaude/froide ameliore l'efficacite du refroidissement.",
+        ),
+        "virtualization": (
+            "Renforcer la virtualisation",
+            "Niveau de virtualisation faible. Plus de consolidation logique"
+            " reduit le nombre de serveurs physiques.",
+        ),
+        "best_practices": (
+            "Maintenir les bonnes pratiques",
+            "Les indicateurs sont deja optimises. Continuer le suivi.",
+        ),
+    },
+}
+
+
+def _make_recommendation(lang: str, rule_id: str) -> Recommendation:
+    # Interned so equal titles/reasons downstream (dedup, DataFrames, JSON)
+    # share one string object.
+    title, reason = _TRANSLATIONS[lang][rule_id]
+    return Recommendation(sys.intern(title), sys.intern(reason), _SAVINGS[rule_id])
+
+
+# Built once at import: the objects are frozen, so every call can share them.
+_RULES_BY_LANG: Dict[str, Tuple[Recommendation, ...]] = {
+    lang: tuple(_make_recommendation(lang, rule_id) for rule_id in _RULE_IDS)
+    for lang in _TRANSLATIONS
+}
+_DEFAULT_BY_LANG: Dict[str, Recommendation] = {
+    lang: _make_recommendation(lang, _DEFAULT_ID) for lang in _TRANSLATIONS
+}
+
+# Healthy sites trigger no rule; they all share one frozen 1-tuple per language.
+_DEFAULT_RESULTS: Dict[str, Tuple[Recommendation]] = {
+    lang: (default,) for lang, default in _DEFAULT_BY_LANG.items()
+}
+
+if np is not None:
+    RULE_SAVINGS = np.array([_SAVINGS[rule_id] for rule_id in _RULE_IDS], dtype=np.float64)
+    RULE_SAVINGS.setflags(write=False)
+    RULE_THRESHOLDS = np.array(_THRESHOLDS, dtype=np.float64)
+    RULE_THRESHOLDS.setflags(write=False)
+else:
+    RULE_SAVINGS = tuple(_SAVINGS[rule_id] for rule_id in _RULE_IDS)
+    RULE_THRESHOLDS = _THRESHOLDS
+
+
+def _table_for(rules: Tuple[Recommendation, ...], default_result: Tuple[Recommendation]):
+    """All 16 rule outcomes; bit i of the index is set when rule i triggers."""
+    return (default_result,) + tuple(
+        tuple(rec for bit, rec in enumerate(rules) if mask >> bit & 1)
+        for mask in range(1, 1 << len(rules))
+    )
+
+
+_TABLES: Dict[str, Tuple[Tuple[Recommendation, ...], ...]] = {
+    lang: _table_for(rules, _DEFAULT_RESULTS[lang]) for lang, rules in _RULES_BY_LANG.items()
+}
+
+
+# Total estimated saving per dispatch code (savings are language independent).
+_SAVING_SUMS_LIST = [_SAVINGS[_DEFAULT_ID]] + [
+    sum(_SAVINGS[rule_id] for bit, rule_id in enumerate(_RULE_IDS) if mask >> bit & 1)
+    for mask in range(1, 1 << len(_RULE_TABLE))
+]
+if np is not None:
+    _SAVING_SUMS = np.array(_SAVING_SUMS_LIST, dtype=np.float64)
+    _SAVING_SUMS.setflags(write=False)
+    _MASK_WEIGHTS = (1 << np.arange(len(_RULE_TABLE))).astype(np.uint8)
+else:
+    _SAVING_SUMS = tuple(_SAVING_SUMS_LIST)
+
+
+def _table(lang: str) -> Tuple[Tuple[Recommendation, ...], ...]:
+    try:
+        return _TABLES[lang]
+    except KeyError:
+        raise ValueError(f"Unsupported language: {lang}") from None
+
+
+# Opt-in rule statistics (GREENDC_RULE_STATS=1): how often each rule triggers, to
+# decide which predicates are worth ordering first in the scalar path.
+_RULE_STATS_ENABLED = os.getenv("GREENDC_RULE_STATS", "").strip().lower() in {"1", "true", "yes"}
+_rule_hits = [0] * len(_RULE_TABLE)
+_rule_calls = 0
+
+
+def _record_hits(mask: int) -> None:
+    global _rule_calls
+    _rule_calls += 1
+    for bit in range(len(_rule_hits)):
+        if mask >> bit & 1:
+            _rule_hits[bit] += 1
+
+
+def rule_hit_rates() -> Dict[str, float]:
+    """Fraction of recorded calls that triggered each rule (empty unless GREENDC_RULE_STATS=1)."""
+    if not _rule_calls:
+        return {}
+    return {rule_id: hits / _rule_calls for rule_id, hits in zip(_RULE_IDS, _rule_hits)}
+
+
+def rules_by_hit_rate() -> Tuple[str, ...]:
+    """Rule ids sorted from most to least frequently triggered."""
+    rates = rule_hit_rates()
+    return tuple(sorted(_RULE_IDS, key=lambda rule_id: rates.get(rule_id, 0.0), reverse=True))
+
+
 def build_recommendations(
     cpu_utilization_pct: float,
     cooling_setpoint_c: float,
     has_aisle_containment: bool,
     virtualization_level_pct: float,
-) -> List[Recommendation]:
-    recommendations: List[Recommendation] = []
-
-    if cpu_utilization_pct < 30:
-        recommendations.append(
-            Recommendation(
-                title="Consolidation des serveurs",
-                reason=(
-                    "Faible taux d'utilisation CPU. Consolider permet de reduire le parc"
-                    " et les pertes d'energie."
-                ),
-                estimated_saving_pct=8.0,
-            )
-        )
+    lang: str = "fr",
+) -> Tuple[Recommendation, ...]:
+    # One 4-bit code instead of four branches; bit order matches _RULE_TABLE.
+    values = (
+        cpu_utilization_pct,
+        cooling_setpoint_c,
+        bool(has_aisle_containment),
+        virtualization_level_pct,
+    )
+    mask = sum(
+        [1 << bit for bit, (value, threshold) in enumerate(zip(values, _THRESHOLDS)) if value < threshold]
+    )
+    if _RULE_STATS_ENABLED:
+        _record_hits(mask)
+    return _table(lang)[mask]
 
-    if cooling_setpoint_c < 22:
-        recommendations.append(
-            Recommendation(
-                title="Optimisation du point de consigne de refroidissement",
-                reason=(
-                    "La temperature est basse. Un setpoint plus eleve peut reduire la"
-                    " consommation de refroidissement."
-                ),
-                estimated_saving_pct=6.0,
-            )
-        )
 
-    if not has_aisle_containment:
-        recommendations.append(
-            Recommendation(
-                title="Mise en place d'allee chaude/froide",
-                reason=(
-                    "L'absence de confinement augmente les pertes. L'ajout d'allee"
-                    " chaude/froide ameliore l'efficacite du refroidissement."
-                ),
-                estimated_saving_pct=5.0,
-            )
-        )
+if njit is not None and np is not None:
 
-    if virtualization_level_pct < 60:
-        recommendations.append(
-            Recommendation(
-                title="Renforcer la virtualisation",
-                reason=(
-                    "Niveau de virtualisation faible. Plus de consolidation logique"
-                    " reduit le nombre de serveurs physiques."
-                ),
-                estimated_saving_pct=7.0,
-            )
-        )
+    @njit(parallel=True, cache=True)
+    def _rule_mask_kernel(cpu, cooling, aisle, virtualization, thresholds, out):
+        for i in prange(cpu.shape[0]):
+            out[i, 0] = cpu[i] < thresholds[0]
+            out[i, 1] = cooling[i] < thresholds[1]
+            out[i, 2] = not aisle[i]
+            out[i, 3] = virtualization[i] < thresholds[3]
+
+else:
+    _rule_mask_kernel = None
+
+
+def build_recommendations_batch(
+    cpu_utilization_pct: Sequence[float],
+    cooling_setpoint_c: Sequence[float],
+    has_aisle_containment: Sequence[bool],
+    virtualization_level_pct: Sequence[float],
+):
+    """
+    Evaluate the legacy rules for a whole fleet of sites in one pass.
 
-    if not recommendations:
-        recommendations.append(
-            Recommendation(
-                title="Maintenir les bonnes pratiques",
-                reason="Les indicateurs sont deja optimises. Continuer le suivi.",
-                estimated_saving_pct=0.0,
-            )
+    Args:
+        cpu_utilization_pct     : CPU utilization per site (%)
+        cooling_setpoint_c      : Cooling setpoint per site (°C)
+        has_aisle_containment   : Aisle containment flag per site
+        virtualization_level_pct: Virtualization level per site (%)
+
+    Returns:
+        (mask, savings) where mask is an (N, 4) boolean array (one column per
+        rule, same order as build_recommendations) and savings is the
+        read-only saving vector [8, 6, 5, 7] matching those columns.
+        Use recommendations_from_mask() to materialize a single row.
+    """
+    if np is None:
+        raise ImportError("numpy is required for build_recommendations_batch")
+
+    cpu = np.asarray(cpu_utilization_pct, dtype=np.float64)
+    cooling = np.asarray(cooling_setpoint_c, dtype=np.float64)
+    aisle = np.asarray(has_aisle_containment, dtype=bool)
+    virtualization = np.asarray(virtualization_level_pct, dtype=np.float64)
+    # The kernel indexes every input by cpu's length without bounds checks.
+    columns = (cpu, cooling, aisle, virtualization)
+    if any(column.ndim != 1 for column in columns):
+        raise ValueError("build_recommendations_batch expects 1-D sequences")
+    if any(column.shape != cpu.shape for column in columns):
+        raise ValueError(
+            "build_recommendations_batch inputs must have the same length, got "
+            + ", ".join(str(column.shape[0]) for column in columns)
         )
 
-    return recommendations
+    mask = np.empty((cpu.shape[0], len(_RULE_TABLE)), dtype=bool)
+    if _rule_mask_kernel is not None:
+        _rule_mask_kernel(cpu, cooling, aisle, virtualization, RULE_THRESHOLDS, mask)
+        return mask, RULE_SAVINGS
+    for bit, values in enumerate(columns):
+        if values is aisle:
+            np.logical_not(aisle, out=mask[:, bit])
+        else:
+            np.less(values, _THRESHOLDS[bit], out=mask[:, bit])
+    return mask, RULE_SAVINGS
 
 
-__all__ = [
-    "get_cooling_recommendations",
-    "get_it_recommendations",
-    "get_power_recommendations",
-    "build_recommendations",
-]
+def recommendations_from_mask(row: Sequence[bool], lang: str = "fr") -> Tuple[Recommendation, ...]:
+    """Materialize the recommendations for one row of a batch mask."""
+    mask = sum(1 << bit for bit, hit in enumerate(row) if hit)
+    return _table(lang)[mask]
+
+
+def fleet_savings(mask):
+    """
+    Total estimated saving (%) per site, as one table gather.
+
+    Args:
+        mask: Either the (N, 4) boolean mask from build_recommendations_batch()
+              or 1-D integer dispatch codes (bit i set when rule i triggers).
+
+    Returns:
+        float64 array of length N with the summed estimated_saving_pct.
+    """
+    if np is None:
+        raise ImportError("numpy is required for fleet_savings")
+
+    mask = np.asarray(mask)
+    codes = mask.astype(np.uint8) @ _MASK_WEIGHTS if mask.ndim == 2 else mask
+    return _SAVING_SUMS[codes]
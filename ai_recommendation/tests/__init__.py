@@ -4,11 +4,12 @@ Tests integration with energy_metrics and validation of recommendation rules.
 """
 
 from .test_engine import TestRecommendationEngine
-from .test_rules import TestCoolingRules, TestITRules, TestPowerRules
+from .test_rules import TestCoolingRules, TestITRules, TestPowerRules, TestLegacyRules
 
 __all__ = [
     'TestRecommendationEngine',
     'TestCoolingRules',
     'TestITRules',
-    'TestPowerRules'
+    'TestPowerRules',
+    'TestLegacyRules'
 ]
\ No newline at end of file
@@ -12,6 +12,17 @@ from ai_recommendation.models import AuditContext
 from ai_recommendation.rules.cooling_rules import get_cooling_recommendations
 from ai_recommendation.rules.it_rules import get_it_recommendations
 from ai_recommendation.rules.power_rules import get_power_recommendations
+from ai_recommendation.rules import (
+    build_recommendations,
+    build_recommendations_batch,
+    fleet_savings,
+    recommendations_from_mask,
+)
+
+try:
+    import numpy as np
+except ImportError:  # the batch helpers need numpy; their tests are skipped without it
+    np = None
 
 
 class TestCoolingRules(unittest.TestCase):
@@ -146,5 +157,69 @@ class TestPowerRules(unittest.TestCase):
         self.assertEqual(len(pue_recs), 1)
 
 
+
+class TestLegacyRules(unittest.TestCase):
+    """Test the legacy build_recommendations rules"""
+
+    def test_all_rules_trigger(self):
+        recs = build_recommendations(18, 19, False, 45)
+        self.assertEqual([r.estimated_saving_pct for r in recs], [8.0, 6.0, 5.0, 7.0])
+
+    def test_french_translation(self):
+        recs = build_recommendations(18, 24, True, 80, lang="fr")
+        self.assertEqual(recs[0].title, "Consolidation des serveurs")
+        self.assertEqual(recs[0].estimated_saving_pct, 8.0)
+
+    def test_default_language_is_french(self):
+        recs = build_recommendations(18, 24, True, 80)
+        self.assertEqual(recs[0].title, "Consolidation des serveurs")
+
+    def test_english_translation(self):
+        recs = build_recommendations(18, 24, True, 80, lang="en")
+        self.assertEqual(recs[0].title, "Server consolidation")
+        self.assertEqual(recs[0].estimated_saving_pct, 8.0)
+
+    def test_aisle_flag_uses_truthiness(self):
+        recs = build_recommendations(50, 24, None, 80, lang="en")
+        self.assertEqual([r.title for r in recs], ["Add hot/cold aisle containment"])
+        recs = build_recommendations(50, 24, 0.5, 80, lang="en")
+        self.assertEqual([r.title for r in recs], ["Maintain best practices"])
+
+    def test_results_are_shared_tuples(self):
+        recs = build_recommendations(18, 19, False, 45)
+        self.assertIsInstance(recs, tuple)
+        self.assertIs(recs, build_recommendations(10, 15, False, 30))
+
+    def test_optimized_inputs_return_default(self):
+        recs = build_recommendations(50, 24, True, 80)
+        self.assertEqual(len(recs), 1)
+        self.assertEqual(recs[0].estimated_saving_pct, 0.0)
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_batch_matches_scalar_rules(self):
+        sites = [(18, 19, False, 45), (50, 24, True, 80), (29.9, 22, True, 59.9)]
+        mask, savings = build_recommendations_batch(*zip(*sites))
+
+        self.assertEqual(mask.shape, (3, 4))
+        self.assertEqual(list(savings), [8.0, 6.0, 5.0, 7.0])
+        for row, site in zip(mask, sites):
+            self.assertEqual(recommendations_from_mask(row), build_recommendations(*site))
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_batch_rejects_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            build_recommendations_batch([1, 2, 3], [1], [True], [1, 2, 3])
+        with self.assertRaises(ValueError):
+            build_recommendations_batch(18, 19, False, 45)
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_fleet_savings(self):
+        sites = [(18, 19, False, 45), (50, 24, True, 80), (29.9, 22, True, 59.9)]
+        mask, _ = build_recommendations_batch(*zip(*sites))
+
+        self.assertEqual(list(fleet_savings(mask)), [26.0, 0.0, 15.0])
+        self.assertEqual(list(fleet_savings([0, 15, 1])), [0.0, 26.0, 8.0])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,27 @@
-from .metrics import calculate_co2_tonnes, calculate_dcie, calculate_pue, calculate_all_metrics
+from .metrics import (
+    EnergyMetrics,
+    cached_pue,
+    calculate_all_metrics,
+    calculate_co2_tonnes,
+    calculate_co2_tonnes_array,
+    calculate_dcie,
+    calculate_dcie_array,
+    calculate_energy_metrics,
+    calculate_pue,
+    calculate_pue_array,
+    pue_cache_clear,
+)
 
 __all__ = [
     "calculate_pue",
+    "cached_pue",
+    "pue_cache_clear",
     "calculate_dcie",
     "calculate_co2_tonnes",
+    "calculate_pue_array",
+    "calculate_dcie_array",
+    "calculate_co2_tonnes_array",
+    "calculate_energy_metrics",
+    "EnergyMetrics",
     "calculate_all_metrics",
 ]
@@ -0,0 +1,21 @@
+"""
+Optional Numba kernels for the fleet-wide metric functions.
+
+Kept out of metrics.py so that module stays plain typed Python (and can be
+compiled with mypyc); Numba can only JIT regular Python functions.
+"""
+
+try:
+    import numba
+except ImportError:  # optional: the *_array variants fall back to plain NumPy
+    numba = None  # type: ignore[assignment]
+
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def guarded_ratio_kernel(numerator, denominator, out):
+        for i in numba.prange(out.shape[0]):
+            out[i] = numerator[i] / denominator[i] if denominator[i] > 0 else 0
+
+else:
+    guarded_ratio_kernel = None
@@ -1,15 +1,26 @@
 import os
 import sys
 
+import base64
+import hashlib
+import io
 import json
 import logging
 import warnings
-import pandas as pd
+from typing import TYPE_CHECKING
 import streamlit as st
-import altair as alt
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from datetime import datetime, timezone
 import re
-import glob
+import importlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# pandas and altair are imported where they are used, so sessions that stay on
+# the Landing or About page never load them.
+if TYPE_CHECKING:
+    import pandas as pd
+
 try:
     from dotenv import load_dotenv
 except Exception:
@@ -28,7 +39,12 @@ from ai_recommendation import (
     RecommendationEngine,
     AuditContext,
 )
-from energy_metrics import calculate_co2_tonnes, calculate_dcie, calculate_pue, calculate_all_metrics
+from energy_metrics import (
+    cached_pue,
+    calculate_all_metrics,
+    calculate_co2_tonnes,
+    calculate_energy_metrics,
+)
 from simulation import get_simulation_results
 
 logging.getLogger("pypdf").setLevel(logging.ERROR)
@@ -47,67 +63,90 @@ def safe_filename(name: str) -> str:
     return cleaned
 
 
+# French rule texts from the legacy engine and their English display versions.
+_RECOMMENDATION_TRANSLATIONS = {
+    "Consolidation des serveurs": "Server consolidation",
+    "Faible taux d'utilisation CPU. Consolider permet de reduire le parc et les pertes d'energie.": (
+        "Low CPU utilization. Consolidation reduces the server fleet and avoids idle energy losses."
+    ),
+    "Faible taux d'utilisation CPU. Consolider permet de réduire le parc et les pertes d'énergie.": (
+        "Low CPU utilization. Consolidation reduces the server fleet and avoids idle energy losses."
+    ),
+    "Optimisation du point de consigne de refroidissement": "Optimize cooling setpoint",
+    "La temperature est basse. Un setpoint plus eleve peut reduire la consommation de refroidissement.": (
+        "Current temperature is low. Raising the setpoint can reduce cooling consumption."
+    ),
+    "La température est basse. Un setpoint plus élevé peut réduire la consommation de refroidissement.": (
+        "Current temperature is low. Raising the setpoint can reduce cooling consumption."
+    ),
+    "Mise en place d'allee chaude/froide": "Add hot/cold aisle containment",
+    "L'absence de confinement augmente les pertes. L'ajout d'allee chaude/froide ameliore l'efficacite du refroidissement.": (
+        "Lack of containment increases losses. Aisle containment improves cooling efficiency."
+    ),
+    "L'absence de confinement augmente les pertes. L'ajout d'allée chaude/froide améliore l'efficacité du refroidissement.": (
+        "Lack of containment increases losses. Aisle containment improves cooling efficiency."
+    ),
+    "Renforcer la virtualisation": "Increase virtualization",
+    "Niveau de virtualisation faible. Plus de consolidation logique reduit le nombre de serveurs physiques.": (
+        "Low virtualization level. More logical consolidation reduces the number of physical servers."
+    ),
+    "Niveau de virtualisation faible. Plus de consolidation logique réduit le nombre de serveurs physiques.": (
+        "Low virtualization level. More logical consolidation reduces the number of physical servers."
+    ),
+}
+# Compiled once; replacements still apply in order, case-insensitively.
+_RECOMMENDATION_TRANSLATION_PATTERNS = tuple(
+    (re.compile(re.escape(src), re.IGNORECASE), dst) for src, dst in _RECOMMENDATION_TRANSLATIONS.items()
+)
+
+
 def normalize_recommendation_text(text: str) -> str:
     if not text:
         return text
-    replacements = {
-        "Consolidation des serveurs": "Server consolidation",
-        "Faible taux d'utilisation CPU. Consolider permet de reduire le parc et les pertes d'energie.": (
-            "Low CPU utilization. Consolidation reduces the server fleet and avoids idle energy losses."
-        ),
-        "Faible taux d'utilisation CPU. Consolider permet de réduire le parc et les pertes d'énergie.": (
-            "Low CPU utilization. Consolidation reduces the server fleet and avoids idle energy losses."
-        ),
-        "Optimisation du point de consigne de refroidissement": "Optimize cooling setpoint",
-        "La temperature est basse. Un setpoint plus eleve peut reduire la consommation de refroidissement.": (
-            "Current temperature is low. Raising the setpoint can reduce cooling consumption."
-        ),
-        "La température est basse. Un setpoint plus élevé peut réduire la consommation de refroidissement.": (
-            "Current temperature is low. Raising the setpoint can reduce cooling consumption."
-        ),
-        "Mise en place d'allee chaude/froide": "Add hot/cold aisle containment",
-        "L'absence de confinement augmente les pertes. L'ajout d'allee chaude/froide ameliore l'efficacite du refroidissement.": (
-            "Lack of containment increases losses. Aisle containment improves cooling efficiency."
-        ),
-        "L'absence de confinement augmente les pertes. L'ajout d'allée chaude/froide améliore l'efficacité du refroidissement.": (
-            "Lack of containment increases losses. Aisle containment improves cooling efficiency."
-        ),
-        "Renforcer la virtualisation": "Increase virtualization",
-        "Niveau de virtualisation faible. Plus de consolidation logique reduit le nombre de serveurs physiques.": (
-            "Low virtualization level. More logical consolidation reduces the number of physical servers."
-        ),
-        "Niveau de virtualisation faible. Plus de consolidation logique réduit le nombre de serveurs physiques.": (
-            "Low virtualization level. More logical consolidation reduces the number of physical servers."
-        ),
-    }
-    for src, dst in replacements.items():
-        if re.search(re.escape(src), text, flags=re.IGNORECASE):
-            text = re.sub(re.escape(src), dst, text, flags=re.IGNORECASE)
+    for pattern, dst in _RECOMMENDATION_TRANSLATION_PATTERNS:
+        text = pattern.sub(dst, text)
     return text
 
 
+def _rewind(source) -> None:
+    """Seek a file-like source back to the start; paths are left alone."""
+    try:
+        source.seek(0)
+    except AttributeError:
+        pass
+
+
 def save_uploaded_file(uploaded_file, target_dir: str) -> str:
     ensure_dir(target_dir)
     ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     filename = f"{ts}_{safe_filename(uploaded_file.name)}"
     target_path = os.path.join(target_dir, filename)
+    _rewind(uploaded_file)
     with open(target_path, "wb") as handle:
-        handle.write(uploaded_file.getbuffer())
+        shutil.copyfileobj(uploaded_file, handle, 1 << 20)
     return target_path
 
 
 def append_manifest(manifest_path: str, entry: dict) -> None:
+    # JSON Lines: one entry per line, appended without re-reading the file.
     ensure_dir(os.path.dirname(manifest_path))
-    data = []
-    if os.path.exists(manifest_path):
-        try:
-            with open(manifest_path, "r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except Exception:
-            data = []
-    data.append(entry)
-    with open(manifest_path, "w", encoding="utf-8") as handle:
-        json.dump(data, handle, indent=2)
+    with open(manifest_path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def read_manifest(manifest_path: str):
+    """Yield manifest entries lazily, skipping unreadable lines."""
+    if not os.path.exists(manifest_path):
+        return
+    with open(manifest_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
 
 
 def cleanup_uploaded_docs() -> None:
@@ -132,6 +171,8 @@ def load_case_study_csv() -> tuple[dict, list[dict]]:
     csv_path = os.path.join(PROJECT_ROOT, "case_study", "google_case_study.csv")
     if not os.path.exists(csv_path):
         return {}, []
+    import pandas as pd
+
     try:
         df = pd.read_csv(csv_path)
     except Exception:
@@ -239,7 +280,15 @@ def load_td_validation() -> list[dict]:
         return []
 
 
-def render_table(df: pd.DataFrame, title: str) -> None:
+def render_html(html: str) -> None:
+    """Render a static HTML fragment, skipping the markdown parser when st.html exists."""
+    if hasattr(st, "html"):
+        st.html(html)
+    else:
+        st.markdown(html, unsafe_allow_html=True)
+
+
+def render_table(df: "pd.DataFrame", title: str) -> None:
     if df.empty:
         return
     st.markdown(f"<div class='subtle'><b>{title}</b></div>", unsafe_allow_html=True)
@@ -253,35 +302,130 @@ def render_table(df: pd.DataFrame, title: str) -> None:
         return []
 
 
-def upload_to_huggingface(file_path: str, repo_id: str, token: str) -> str:
+@st.cache_resource(show_spinner=False)
+def _optional_import(module: str):
+    """Import an optional dependency once; None when it is not installed.
+
+    cache_resource keeps the result across reruns (app.py is re-executed each
+    time), so per-file helpers skip repeated failed imports.
+    """
     try:
-        from huggingface_hub import HfApi
-    except Exception:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _hf_api(token: str):
+    """Shared HfApi client per token, so its HTTP session is reused."""
+    hub = _optional_import("huggingface_hub")
+    if hub is None:
+        raise ImportError("huggingface_hub is not installed")
+    return hub.HfApi(token=token or None)
+
+
+def upload_files_to_huggingface(file_paths: list[str], repo_id: str, token: str) -> str:
+    """Upload all files under uploads/ in a single dataset commit."""
+    hub = _optional_import("huggingface_hub")
+    if hub is None:
         return "Missing dependency: huggingface_hub. Run: pip install -r requirements.txt"
-    api = HfApi(token=token)
-    filename = os.path.basename(file_path)
-    api.upload_file(
-        path_or_fileobj=file_path,
-        path_in_repo=f"uploads/{filename}",
+    api = _hf_api(token)
+    operations = [
+        hub.CommitOperationAdd(path_in_repo=f"uploads/{os.path.basename(path)}", path_or_fileobj=path)
+        for path in file_paths
+    ]
+    api.create_commit(
         repo_id=repo_id,
         repo_type="dataset",
+        operations=operations,
+        commit_message=f"Upload {len(operations)} audit document(s)",
     )
     return "OK"
 
 
+def upload_to_huggingface(file_path: str, repo_id: str, token: str) -> str:
+    return upload_files_to_huggingface([file_path], repo_id, token)
+
+
 def list_hf_files(repo_id: str, token: str) -> tuple[bool, list[str], str]:
     try:
-        from huggingface_hub import HfApi
+        api = _hf_api(token)
     except Exception:
         return False, [], "Missing dependency: huggingface_hub. Run: pip install -r requirements.txt"
     try:
-        api = HfApi(token=token or None)
         files = api.list_repo_files(repo_id=repo_id, repo_type="dataset")
         return True, files, ""
     except Exception as exc:
         return False, [], str(exc)
 
 
+_METRIC_PATTERNS = {
+    key: re.compile(pattern, re.IGNORECASE)
+    for key, pattern in {
+        "pue": r"\bPUE\b[^0-9]{0,20}([0-9][0-9,.\s]*)",
+        "dcie": r"\bDCiE\b[^0-9]{0,20}([0-9][0-9,.\s]*)",
+        "co2_tonnes": r"\bCO2\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*(?:t|tonnes|tco2)",
+        "it_energy_mwh": (
+            r"\bIT\s*energy(?:\s*\(campus\))?(?:\s*consumption)?\b[^0-9]{0,80}([0-9][0-9,.\s]*)\s*(MWh|TWh)"
+        ),
+        "total_energy_mwh": (
+            r"\bTotal\s*(?:data\s*center\s*)?energy(?:\s*\(campus\))?(?:\s*consumption)?\b[^0-9]{0,80}"
+            r"([0-9][0-9,.\s]*)\s*(MWh|TWh)"
+        ),
+        "cpu_utilization": r"\bCPU\s*utilization\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*%?",
+        "servers": r"\b(?:Approx\.?\s*)?servers\b[^0-9]{0,20}([0-9][0-9,.\s]*)",
+        "cooling_setpoint": r"\bCooling\s*Setpoint\b[^0-9]{0,10}([0-9][0-9,.\s]*)",
+        "virtualization_level": r"\bVirtualization\b[^0-9]{0,10}([0-9][0-9,.\s]*)\s*%?",
+        "carbon_factor": r"\bCarbon\s*factor\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*(?:kg|g)?\s*CO2\s*/\s*kWh",
+        "latency_ms": r"\bLatency\b[^0-9]{0,10}([0-9][0-9,.\s]*)\s*ms",
+        "energy_wh_inference": r"\bEnergy\b[^0-9]{0,15}([0-9][0-9,.\s]*)\s*Wh\s*/?\s*inference",
+        "energy_kwh_inference": r"\bEnergy\b[^0-9]{0,15}([0-9][0-9,.\s]*)\s*kWh\s*/?\s*inference",
+        "cost_per_million": r"\bCost\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*€\s*/?\s*1,?000,?000\s*inferences",
+    }.items()
+}
+# Patterns whose second group is an MWh/TWh unit.
+_ENERGY_METRICS = {"it_energy_mwh", "total_energy_mwh"}
+# Every metric pattern starts with one of these words; a single keyword pass
+# finds the candidate positions and only those are tried with the full pattern.
+_METRIC_KEYWORDS = {
+    "pue": ("pue",),
+    "dcie": ("dcie",),
+    "co2": ("co2_tonnes",),
+    "it": ("it_energy_mwh",),
+    "total": ("total_energy_mwh",),
+    "cpu": ("cpu_utilization",),
+    "approx": ("servers",),
+    "servers": ("servers",),
+    "cooling": ("cooling_setpoint",),
+    "virtualization": ("virtualization_level",),
+    "carbon": ("carbon_factor",),
+    "latency": ("latency_ms",),
+    "energy": ("energy_wh_inference", "energy_kwh_inference"),
+    "cost": ("cost_per_million",),
+}
+# One named group per keyword: IGNORECASE also matches Unicode variants such
+# as "İT" or "ſervers", so the keyword is read from lastgroup, not the text.
+_METRIC_KEYWORD_SCANNER = re.compile(
+    r"\b(?:" + "|".join(f"(?P<{keyword}>{keyword})" for keyword in _METRIC_KEYWORDS) + ")",
+    re.IGNORECASE,
+)
+_METRIC_NUMBER_STRIP = re.compile(r"[^0-9,.\-]")
+
+
+def _first_metric_matches(text: str) -> dict:
+    """Leftmost match per metric pattern (same result as one re.search each)."""
+    found = {}
+    for keyword in _METRIC_KEYWORD_SCANNER.finditer(text):
+        for key in _METRIC_KEYWORDS[keyword.lastgroup]:
+            if key not in found:
+                match = _METRIC_PATTERNS[key].match(text, keyword.start())
+                if match:
+                    found[key] = match
+        if len(found) == len(_METRIC_PATTERNS):
+            break
+    return found
+
+
 def extract_metrics_from_text(text: str) -> dict:
     metrics = {}
     if not text:
@@ -291,7 +435,7 @@ def extract_metrics_from_text(text: str) -> dict:
             return None
         cleaned = raw.strip()
         cleaned = cleaned.replace("~", "").replace("≈", "")
-        cleaned = re.sub(r"[^0-9,.\-]", "", cleaned)
+        cleaned = _METRIC_NUMBER_STRIP.sub("", cleaned)
         if not cleaned:
             return None
         if "," in cleaned and "." in cleaned:
@@ -303,47 +447,13 @@ def extract_metrics_from_text(text: str) -> dict:
         except Exception:
             return None
 
-    def _match_number(pattern: str) -> float | None:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if not match:
-            return None
-        return _to_float(match.group(1))
-
-    def _match_energy(pattern: str) -> float | None:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if not match:
-            return None
+    for key, match in _first_metric_matches(text).items():
         value = _to_float(match.group(1))
-        unit = match.group(2).lower() if match.group(2) else "mwh"
         if value is None:
-            return None
-        if unit == "twh":
+            continue
+        if key in _ENERGY_METRICS and match.group(2).lower() == "twh":
             value *= 1_000_000
-        return value
-
-    metrics["pue"] = _match_number(r"\bPUE\b[^0-9]{0,20}([0-9][0-9,.\s]*)")
-    metrics["dcie"] = _match_number(r"\bDCiE\b[^0-9]{0,20}([0-9][0-9,.\s]*)")
-    metrics["co2_tonnes"] = _match_number(r"\bCO2\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*(?:t|tonnes|tco2)")
-    metrics["it_energy_mwh"] = _match_energy(
-        r"\bIT\s*energy(?:\s*\(campus\))?(?:\s*consumption)?\b[^0-9]{0,80}([0-9][0-9,.\s]*)\s*(MWh|TWh)"
-    )
-    metrics["total_energy_mwh"] = _match_energy(
-        r"\bTotal\s*(?:data\s*center\s*)?energy(?:\s*\(campus\))?(?:\s*consumption)?\b[^0-9]{0,80}([0-9][0-9,.\s]*)\s*(MWh|TWh)"
-    )
-    metrics["cpu_utilization"] = _match_number(r"\bCPU\s*utilization\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*%?")
-    metrics["servers"] = _match_number(r"\b(?:Approx\.?\s*)?servers\b[^0-9]{0,20}([0-9][0-9,.\s]*)")
-    metrics["cooling_setpoint"] = _match_number(r"\bCooling\s*Setpoint\b[^0-9]{0,10}([0-9][0-9,.\s]*)")
-    metrics["virtualization_level"] = _match_number(r"\bVirtualization\b[^0-9]{0,10}([0-9][0-9,.\s]*)\s*%?")
-    metrics["carbon_factor"] = _match_number(
-        r"\bCarbon\s*factor\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*(?:kg|g)?\s*CO2\s*/\s*kWh"
-    )
-    metrics["latency_ms"] = _match_number(r"\bLatency\b[^0-9]{0,10}([0-9][0-9,.\s]*)\s*ms")
-    metrics["energy_wh_inference"] = _match_number(r"\bEnergy\b[^0-9]{0,15}([0-9][0-9,.\s]*)\s*Wh\s*/?\s*inference")
-    metrics["energy_kwh_inference"] = _match_number(r"\bEnergy\b[^0-9]{0,15}([0-9][0-9,.\s]*)\s*kWh\s*/?\s*inference")
-    metrics["cost_per_million"] = _match_number(
-        r"\bCost\b[^0-9]{0,20}([0-9][0-9,.\s]*)\s*€\s*/?\s*1,?000,?000\s*inferences"
-    )
-    metrics = {k: v for k, v in metrics.items() if v is not None}
+        metrics[key] = value
     if "it_energy_mwh" in metrics and "total_energy_mwh" in metrics:
         it_energy = metrics["it_energy_mwh"]
         total_energy = metrics["total_energy_mwh"]
@@ -353,170 +463,287 @@ def extract_metrics_from_text(text: str) -> dict:
     return metrics
 
 
+class ScannedPDFError(ValueError):
+    """The PDF is a scan with no text layer; OCR would be needed."""
+
+
+def _extract_pdf_pages(source, max_pages: int) -> list[str]:
+    """Text of the first `max_pages` pages of a PDF path or uploaded file.
+
+    Uses PyMuPDF (C-backed, much faster) when installed, otherwise pypdf.
+    Raises ImportError when neither is available, and ScannedPDFError (PyMuPDF
+    only) as soon as the first page turns out to be an image without text.
+    """
+    pymupdf = _optional_import("pymupdf")
+    _rewind(source)
+    if pymupdf is not None:
+        if isinstance(source, str):
+            doc = pymupdf.open(source)
+        else:
+            doc = pymupdf.open(stream=source.read(), filetype="pdf")
+        with doc:
+            pages_text = []
+            for page in doc.pages(0, min(max_pages, doc.page_count)):
+                text = page.get_text("text").strip()
+                # An image-only first page means a scan without a text layer:
+                # the remaining pages won't have text either.
+                if not pages_text and not text and page.get_images():
+                    raise ScannedPDFError("PDF has no text layer")
+                pages_text.append(text)
+            return pages_text
+    pypdf = _optional_import("pypdf")
+    if pypdf is None:
+        raise ImportError("pymupdf or pypdf is required to read PDFs")
+    reader = pypdf.PdfReader(source)
+    return [(page.extract_text() or "").strip() for page in reader.pages[:max_pages]]
+
+
+def _count_csv_rows(uploaded_file) -> int:
+    """Data rows of a CSV upload, counted as newlines in the raw bytes."""
+    if hasattr(uploaded_file, "getvalue"):
+        data = uploaded_file.getvalue()
+    else:
+        uploaded_file.seek(0)
+        data = uploaded_file.read()
+    if isinstance(data, str):
+        data = data.encode()
+    # Ignore trailing blank lines without copying the buffer; every newline
+    # before the last non-blank byte then ends the header or a data row.
+    end = len(data)
+    while end and data[end - 1] in b" \t\r\n":
+        end -= 1
+    return data.count(b"\n", 0, end)
+
+
 def summarize_document(uploaded_file) -> str:
     name = uploaded_file.name.lower()
     if name.endswith(".csv"):
         try:
-            if hasattr(uploaded_file, "seek"):
-                uploaded_file.seek(0)
-            df = pd.read_csv(uploaded_file)
-            cols = ", ".join(df.columns[:12])
-            return f"CSV columns: {cols}. Rows: {len(df)}."
+            _rewind(uploaded_file)
+            import pandas as pd
+
+            # Only the header and a row count are needed: don't parse the body.
+            header = pd.read_csv(uploaded_file, nrows=0)
+            rows = _count_csv_rows(uploaded_file)
+            cols = ", ".join(header.columns[:12])
+            return f"CSV columns: {cols}. Rows: {rows}."
         except Exception:
             return "CSV uploaded but could not be parsed."
     if name.endswith(".docx"):
-        try:
-            if hasattr(uploaded_file, "seek"):
-                uploaded_file.seek(0)
-            from docx import Document
-        except Exception:
-            return "DOCX uploaded. Install python-docx to extract text."
-        try:
-            doc = Document(uploaded_file)
-            paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-            content = " ".join(paragraphs[:20]).strip()
-            if not content:
-                return "DOCX uploaded but no readable text found."
-            return "DOCX summary: " + content[:800]
-        except Exception:
-            return "DOCX uploaded but could not be parsed."
+        return _read_docx(uploaded_file, 0)[0]
     if name.endswith(".pdf"):
-        try:
-            from pypdf import PdfReader
-        except Exception:
-            return "PDF uploaded. Install pypdf to extract text."
-        try:
-            if hasattr(uploaded_file, "seek"):
-                uploaded_file.seek(0)
-            reader = PdfReader(uploaded_file)
-            pages_text = []
-            for page in reader.pages[:3]:
-                text = page.extract_text() or ""
-                pages_text.append(text.strip())
-            content = " ".join(pages_text).strip()
-            if not content:
-                return "PDF uploaded but no readable text found."
-            return "PDF summary: " + content[:800]
-        except Exception:
-            return "PDF uploaded but could not be parsed."
+        return _read_pdf(uploaded_file, 3, 0)[0]
     return "Unsupported document type."
 
 
-def extract_pdf_text(uploaded_file, max_pages: int = 6) -> str:
+def _docx_paragraphs(source) -> list[str]:
+    docx = _optional_import("docx")
+    if docx is None:
+        raise ImportError("python-docx is required to read DOCX files")
+    _rewind(source)
+    doc = docx.Document(source)
+    return [p.text.strip() for p in doc.paragraphs if p.text.strip()]
+
+
+def _read_docx(uploaded_file, max_paragraphs: int) -> tuple[str, str]:
+    """Summary and full text (first `max_paragraphs`) from one DOCX parse."""
     try:
-        from pypdf import PdfReader
+        paragraphs = _docx_paragraphs(uploaded_file)
+    except ImportError:
+        return "DOCX uploaded. Install python-docx to extract text.", ""
     except Exception:
-        return ""
+        return "DOCX uploaded but could not be parsed.", ""
+    content = " ".join(paragraphs[:20]).strip()
+    if not content:
+        return "DOCX uploaded but no readable text found.", ""
+    return "DOCX summary: " + content[:800], "\n".join(paragraphs[:max_paragraphs]).strip()
+
+
+def _read_pdf(uploaded_file, summary_pages: int, max_pages: int) -> tuple[str, str]:
+    """Summary (first `summary_pages`) and full text (first `max_pages`) from one PDF parse."""
     try:
-        if hasattr(uploaded_file, "seek"):
-            uploaded_file.seek(0)
-        reader = PdfReader(uploaded_file)
-        pages_text = []
-        for page in reader.pages[:max_pages]:
-            text = page.extract_text() or ""
-            pages_text.append(text.strip())
-        return "\n".join(pages_text).strip()
+        pages_text = _extract_pdf_pages(uploaded_file, max(summary_pages, max_pages))
+    except ImportError:
+        return "PDF uploaded. Install pymupdf or pypdf to extract text.", ""
+    except ScannedPDFError:
+        return "PDF uploaded but no readable text found (scanned PDF - OCR required).", ""
     except Exception:
-        return ""
+        return "PDF uploaded but could not be parsed.", ""
+    content = " ".join(pages_text[:summary_pages]).strip()
+    if not content:
+        return "PDF uploaded but no readable text found.", ""
+    return "PDF summary: " + content[:800], "\n".join(pages_text[:max_pages]).strip()
 
 
-def extract_docx_text(uploaded_file, max_paragraphs: int = 80) -> str:
+def extract_pdf_text(uploaded_file, max_pages: int = 6) -> str:
     try:
-        from docx import Document
+        return "\n".join(_extract_pdf_pages(uploaded_file, max_pages)).strip()
     except Exception:
         return ""
+
+
+def extract_docx_text(uploaded_file, max_paragraphs: int = 80) -> str:
     try:
-        if hasattr(uploaded_file, "seek"):
-            uploaded_file.seek(0)
-        doc = Document(uploaded_file)
-        paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-        return "\n".join(paragraphs[:max_paragraphs]).strip()
+        return "\n".join(_docx_paragraphs(uploaded_file)[:max_paragraphs]).strip()
     except Exception:
         return ""
 
 
-def extract_text_from_path(path: str, max_pages: int = 6, max_paragraphs: int = 80) -> str:
+@st.cache_data(show_spinner=False)
+def _extract_text_cached(path: str, mtime: float, max_pages: int, max_paragraphs: int) -> str:
+    # mtime is only part of the cache key: an edited file gets a fresh entry.
     lower = path.lower()
     if lower.endswith(".pdf"):
         try:
-            from pypdf import PdfReader
-        except Exception:
-            return ""
-        try:
-            reader = PdfReader(path)
-            pages_text = []
-            for page in reader.pages[:max_pages]:
-                text = page.extract_text() or ""
-                pages_text.append(text.strip())
-            return "\n".join(pages_text).strip()
+            return "\n".join(_extract_pdf_pages(path, max_pages)).strip()
         except Exception:
             return ""
     if lower.endswith(".docx"):
-        try:
-            from docx import Document
-        except Exception:
-            return ""
-        try:
-            doc = Document(path)
-            paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-            return "\n".join(paragraphs[:max_paragraphs]).strip()
-        except Exception:
-            return ""
+        return extract_docx_text(path, max_paragraphs)
     return ""
 
 
-def load_local_knowledge_base(root_dir: str) -> dict:
-    patterns = [
-        os.path.join(root_dir, "*.pdf"),
-        os.path.join(root_dir, "*.docx"),
-    ]
-    files = []
-    for pattern in patterns:
-        files.extend(glob.glob(pattern))
+def extract_text_from_path(path: str, max_pages: int = 6, max_paragraphs: int = 80) -> str:
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return ""
+    return _extract_text_cached(path, mtime, max_pages, max_paragraphs)
+
+
+# One shared, read-only copy for every session: cache_resource hands out the same
+# object instead of unpickling the course texts into each session.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_knowledge_base_cached(signature: tuple) -> dict:
     summaries = []
     texts = []
-    for path in files[:8]:
-        text = extract_text_from_path(path)
+    for path, mtime in signature:
+        text = _extract_text_cached(path, mtime, 6, 80)
         if text:
             name = os.path.basename(path)
             summaries.append(f"LOCAL DOC: {name} | {text[:400]}")
             texts.append(text)
-    return {"summaries": summaries, "texts": texts}
+    return {
+        "summaries": tuple(summaries),
+        "texts": tuple(texts),
+        "texts_lower": tuple(text.lower() for text in texts),
+    }
+
+
+def load_local_knowledge_base(root_dir: str) -> dict:
+    # One directory pass for both document types; DirEntry caches the stat
+    # used for the mtime below. Order matches the former per-type globs.
+    by_suffix = {".pdf": [], ".docx": []}
+    try:
+        with os.scandir(root_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                suffix = os.path.splitext(entry.name)[1]
+                if suffix in by_suffix and entry.is_file():
+                    by_suffix[suffix].append(entry)
+    except OSError:
+        pass
+    files = []
+    for found in by_suffix.values():
+        files.extend(sorted(found, key=lambda entry: entry.path))
+    # Re-parse only when a document is added, removed or modified.
+    signature = []
+    for entry in files[:8]:
+        try:
+            signature.append((entry.path, entry.stat().st_mtime))
+        except OSError:
+            continue
+    return _load_knowledge_base_cached(tuple(signature))
+
+
+def parse_uploaded_document(uploaded_file) -> tuple[str, str, dict, str | None]:
+    """Summary, full text, extracted metrics and readability status of one upload."""
+    # PDFs and DOCX files are parsed once for both the summary and the text.
+    name = uploaded_file.name.lower()
+    if name.endswith(".pdf"):
+        summary, full_text = _read_pdf(uploaded_file, 3, 6)
+    elif name.endswith(".docx"):
+        summary, full_text = _read_docx(uploaded_file, 80)
+    else:
+        summary, full_text = summarize_document(uploaded_file), ""
+    status = None
+    if summary.startswith("PDF summary:"):
+        status = "PDF fully readable"
+    elif summary.startswith("DOCX summary:"):
+        status = "DOCX fully readable"
+    elif summary.startswith(("PDF uploaded but no readable text", "PDF uploaded but could not be parsed")):
+        status = "PDF partially readable"
+    elif summary.startswith(("DOCX uploaded but no readable text", "DOCX uploaded but could not be parsed")):
+        status = "DOCX partially readable"
+    metrics = extract_metrics_from_text(full_text) if full_text else {}
+    return summary, full_text, metrics, status
+
+
+_MAX_DOC_TEXTS = 20
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _parse_document_bytes(name: str, data: bytes) -> tuple[str, str, dict, str | None]:
+    """Cached parse keyed on upload content, so reruns and re-uploads skip it."""
+    buffer = io.BytesIO(data)
+    buffer.name = name
+    return parse_uploaded_document(buffer)
+
+
+_TO_FLOAT_STRIP = re.compile(r"[^0-9.\-]")
+_SPLIT_WORD = re.compile(r"\W+")
+
 
 def _to_float(value: str) -> float | None:
     if not value:
         return None
     cleaned = value.strip().replace(" ", "")
+    # Fast path for plain numerics such as "1.45" or "1200": skip the
+    # separator rules and the regex sanitizer.
+    if cleaned.isascii() and cleaned.replace(".", "", 1).isdigit():
+        return float(cleaned)
     if "," in cleaned and "." in cleaned:
         cleaned = cleaned.replace(",", "")
     elif cleaned.count(",") > 1:
         cleaned = cleaned.replace(",", "")
     elif "," in cleaned and "." not in cleaned:
         cleaned = cleaned.replace(",", ".")
-    cleaned = re.sub(r"[^0-9.\-]", "", cleaned)
+    cleaned = _TO_FLOAT_STRIP.sub("", cleaned)
     try:
         return float(cleaned)
     except Exception:
         return None
 
 
-def extract_workload_inputs(text: str) -> dict:
-    if not text:
-        return {}
-    patterns = {
+# Stands in for a leading r"\b" before ([0-9,.]++): only the first word boundary
+# of each number run is tried, so a long "1,1,1,..." paste is scanned once
+# instead of once per comma. Every start inside a run shares the same tail, so
+# the match is the same one r"\b([0-9,.]+)" would find.
+_NUMBER_RUN_START = r"(?<![0-9,.])(?>[0-9,.]*?\b)"
+
+_WORKLOAD_PATTERNS = {
+    key: re.compile(pattern, re.IGNORECASE)
+    for key, pattern in {
         "n_inferences": r"\bN\s*=\s*([0-9,.]+)\s*inferences",
         "gpu_power_w": r"\bP[_\s]*gpu\b[^0-9]{0,10}([0-9,.]+)\s*W",
         "edge_power_w": r"\bP[_\s]*edge\b[^0-9]{0,10}([0-9,.]+)\s*W",
         "gpu_latency_ms": r"\bL[_\s]*gpu\b[^0-9]{0,10}([0-9,.]+)\s*ms",
         "edge_latency_ms": r"\bL[_\s]*edge\b[^0-9]{0,10}([0-9,.]+)\s*ms",
-        "gpu_cost_eur_per_hour": r"\b([0-9,.]+)\s*€\s*/\s*hour",
-        "electricity_cost_eur_per_kwh": r"\b([0-9,.]+)\s*€\s*/\s*kWh",
+        "gpu_cost_eur_per_hour": _NUMBER_RUN_START + r"([0-9,.]++)\s*€\s*/\s*hour",
+        "electricity_cost_eur_per_kwh": _NUMBER_RUN_START + r"([0-9,.]++)\s*€\s*/\s*kWh",
         "hardware_cost_eur": r"\bHardware cost\b[^0-9]{0,20}([0-9,.]+)\s*€",
-        "usage_per_day": r"\b([0-9,.]+)\s*inferences\s*/\s*day",
-    }
+        "usage_per_day": _NUMBER_RUN_START + r"([0-9,.]++)\s*inferences\s*/\s*day",
+    }.items()
+}
+
+
+def extract_workload_inputs(text: str) -> dict:
+    if not text:
+        return {}
     result = {}
-    for key, pattern in patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
+    for key, pattern in _WORKLOAD_PATTERNS.items():
+        match = pattern.search(text)
         if match:
             result[key] = _to_float(match.group(1))
     return result
@@ -577,6 +804,27 @@ def compute_workload_audit(inputs: dict) -> dict:
     }
 
 
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def joined_doc_texts() -> tuple[str, str]:
+    """Uploaded document text joined into one string, plus its digest for cache keys."""
+    joined = st.session_state.get("doc_texts_joined")
+    if joined is None:
+        joined = "\n".join(st.session_state.get("doc_texts", []))
+        st.session_state["doc_texts_joined"] = joined
+        st.session_state["doc_texts_hash"] = text_digest(joined)
+    return joined, st.session_state["doc_texts_hash"]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def workload_audit_from_text(_text: str, text_hash: str) -> tuple[dict, dict]:
+    """Extracted inputs and audit results; keyed on the text digest so the text itself is never rehashed."""
+    inputs = extract_workload_inputs(_text)
+    return inputs, compute_workload_audit(inputs)
+
+
 def summarize_workload_decision(inputs: dict, results: dict) -> str:
     lines = []
     if results["gpu_time_h"] < results["edge_time_h"]:
@@ -598,17 +846,16 @@ def summarize_workload_decision(inputs: dict, results: dict) -> str:
         lines.append("Cost comparison: n/a (missing cost inputs)")
 
     n = inputs.get("n_inferences")
-    if n:
-        doubled_inputs = dict(inputs)
-        doubled_inputs["n_inferences"] = n * 2
-        doubled = compute_workload_audit(doubled_inputs)
-        if "error" not in doubled:
-            if (results["gpu_cost"] is not None and results["edge_cost"] is not None and
-                doubled["gpu_cost"] is not None and doubled["edge_cost"] is not None):
-                change = "no"
-                if (results["gpu_cost"] < results["edge_cost"]) != (doubled["gpu_cost"] < doubled["edge_cost"]):
-                    change = "yes"
-                lines.append(f"Does ranking change if N doubles? {change}")
+    if n and results["gpu_cost"] is not None and results["edge_cost"] is not None:
+        # Both costs are linear in N with no fixed term (hardware is amortized
+        # per inference), so doubling N doubles each cost exactly instead of
+        # rerunning compute_workload_audit.
+        gpu_cost_2n = results["gpu_cost"] * 2
+        edge_cost_2n = results["edge_cost"] * 2
+        change = "no"
+        if (results["gpu_cost"] < results["edge_cost"]) != (gpu_cost_2n < edge_cost_2n):
+            change = "yes"
+        lines.append(f"Does ranking change if N doubles? {change}")
     return "\n".join(f"- {line}" for line in lines)
 
 
@@ -640,6 +887,16 @@ def workload_recommendation(inputs: dict, results: dict) -> str:
     )
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def workload_report_html(_text: str, text_hash: str) -> tuple[str, str]:
+    """Decision and recommendation blocks as HTML, for text whose audit has no error."""
+    inputs, results = workload_audit_from_text(_text, text_hash)
+    decision = summarize_workload_decision(inputs, results)
+    recommendation = workload_recommendation(inputs, results)
+    rec_html = "<br>".join(line.replace("- ", "• ") for line in recommendation.splitlines())
+    return decision.replace("\n", "<br>"), rec_html
+
+
 def business_goal_recommendation(goal: str, results: dict) -> str:
     flags = workload_decision_flags(results)
     if goal == "Minimum cost":
@@ -657,23 +914,65 @@ cleanup_uploaded_docs()
 if "local_docs_loaded" not in st.session_state:
     local_kb = load_local_knowledge_base(PROJECT_ROOT)
     st.session_state["local_doc_texts"] = local_kb["texts"]
+    st.session_state["local_doc_texts_lower"] = local_kb["texts_lower"]
     st.session_state["local_docs_loaded"] = True
 
 
-def find_local_excerpt(question: str, texts: list[str]) -> str | None:
-    if not question or not texts:
-        return None
-    tokens = [t for t in re.split(r"\W+", question.lower()) if len(t) > 4]
-    for text in texts:
-        lower = text.lower()
-        for token in tokens[:8]:
+def _first_token_hit(lower: str, tokens: list[str], automaton) -> int:
+    """Index in `lower` of the earliest-listed token that occurs, or -1.
+
+    With an Aho-Corasick automaton all tokens are located in one pass over
+    the text; otherwise each token is searched with str.find.
+    """
+    if automaton is None:
+        for token in tokens:
             idx = lower.find(token)
             if idx != -1:
-                start = max(0, idx - 140)
-                end = min(len(text), idx + 220)
-                excerpt = text[start:end].strip()
-                if excerpt:
-                    return excerpt.replace("\n", " ")
+                return idx
+        return -1
+    best_rank = len(tokens)
+    best_idx = -1
+    for end, (rank, token) in automaton.iter(lower):
+        if rank < best_rank:
+            best_rank = rank
+            best_idx = end - len(token) + 1
+            if rank == 0:
+                break
+    return best_idx
+
+
+def find_local_excerpt(question: str, texts: list[str], lowered: list[str] | None = None) -> str | None:
+    """Excerpt around the first question keyword found in `texts`.
+
+    `lowered` holds the pre-lowercased texts (same order) so they are not
+    lowercased again on every question.
+    """
+    if not question or not texts:
+        return None
+    tokens = [t for t in _SPLIT_WORD.split(question.lower()) if len(t) > 4][:8]
+    # A repeated keyword keeps its first rank; scanning for it again can't
+    # find an earlier hit, so drop the repeats.
+    tokens = list(dict.fromkeys(tokens))
+    if not tokens:
+        return None
+    ahocorasick = _optional_import("ahocorasick")
+    if ahocorasick is None:
+        automaton = None
+    else:
+        automaton = ahocorasick.Automaton()
+        for rank, token in enumerate(tokens):
+            automaton.add_word(token, (rank, token))
+        automaton.make_automaton()
+    if lowered is None or len(lowered) != len(texts):
+        lowered = [text.lower() for text in texts]
+    for text, lower in zip(texts, lowered):
+        idx = _first_token_hit(lower, tokens, automaton)
+        if idx != -1:
+            start = max(0, idx - 140)
+            end = min(len(text), idx + 220)
+            excerpt = text[start:end].strip()
+            if excerpt:
+                return excerpt.replace("\n", " ")
     return None
 
 
@@ -719,6 +1018,40 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# Static sidebar navigation, sent as one markdown element per rerun.
+_SIDEBAR_NAV_HTML = """
+        <div class="icon-nav">
+            <a href="?page=landing&theme={theme}" title="Landing" target="_self">
+                <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
+                 xmlns="http://www.w3.org/2000/svg"><path d="M4 10h16v10H4z" fill="#7ea6ff"/>
+                 <path d="M12 4l8 6H4l8-6z" fill="#bcd0ff"/></svg>
+            </a>
+            <a href="?page=dashboard&theme={theme}" title="Dashboard" target="_self">
+                <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
+                 xmlns="http://www.w3.org/2000/svg"><path d="M5 19h14v2H5z" fill="#7ea6ff"/>
+                 <path d="M6 17V9h3v8H6zm5 0V5h3v12h-3zm5 0v-6h3v6h-3z" fill="#bcd0ff"/></svg>
+            </a>
+            <a href="?page=about&theme={theme}" title="About" target="_self">
+                <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
+                 xmlns="http://www.w3.org/2000/svg"><circle cx="12" cy="12" r="9" stroke="#7ea6ff" stroke-width="2"/>
+                 <path d="M12 8h.01M11 11h2v5h-2z" fill="#bcd0ff"/></svg>
+            </a>
+        </div>
+        <div class="menu-item">
+            <span>Sections</span>
+            <span class="menu-badge">LIVE</span>
+        </div>
+        <div class="nav-list">
+            <a href="?page=dashboard&theme={theme}#metrics" target="_self">Metrics</a>
+            <a href="?page=dashboard&theme={theme}#recommendations" target="_self">Recommendations</a>
+            <a href="?page=dashboard&theme={theme}#simulation" target="_self">Simulation</a>
+            <a href="?page=about&theme={theme}#about" target="_self">About</a>
+        </div>
+        <div class="menu-item"><span>GreenDC Audit AI</span><span class="menu-badge">OFFLINE</span></div>
+        <div class="nav-list"><a href="?page=dashboard&theme={theme}#assistant" target="_self">Open GreenDC Audit AI</a></div>
+        """
+
+
 with st.sidebar:
     st.markdown("<div class='sidebar-title'>CONTROL PANEL</div>", unsafe_allow_html=True)
     if "compact_sidebar" not in st.session_state:
@@ -745,42 +1078,9 @@ with st.sidebar:
     if st.button("Toggle sidebar width"):
         st.session_state.compact_sidebar = not st.session_state.compact_sidebar
         compact_sidebar = st.session_state.compact_sidebar
-    st.markdown(
-        f"""
-        <div class="icon-nav">
-            <a href="?page=landing&theme={theme_param}" title="Landing" target="_self">
-                <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
-                 xmlns="http://www.w3.org/2000/svg"><path d="M4 10h16v10H4z" fill="#7ea6ff"/>
-                 <path d="M12 4l8 6H4l8-6z" fill="#bcd0ff"/></svg>
-            </a>
-            <a href="?page=dashboard&theme={theme_param}" title="Dashboard" target="_self">
-                <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
-                 xmlns="http://www.w3.org/2000/svg"><path d="M5 19h14v2H5z" fill="#7ea6ff"/>
-                 <path d="M6 17V9h3v8H6zm5 0V5h3v12h-3zm5 0v-6h3v6h-3z" fill="#bcd0ff"/></svg>
-            </a>
-            <a href="?page=about&theme={theme_param}" title="About" target="_self">
-                <svg width="16" height="16" viewBox="0 0 24 24" fill="none"
-                 xmlns="http://www.w3.org/2000/svg"><circle cx="12" cy="12" r="9" stroke="#7ea6ff" stroke-width="2"/>
-                 <path d="M12 8h.01M11 11h2v5h-2z" fill="#bcd0ff"/></svg>
-            </a>
-        </div>
-        <div class="menu-item">
-            <span>Sections</span>
-            <span class="menu-badge">LIVE</span>
-        </div>
-        <div class="nav-list">
-            <a href="?page=dashboard&theme={theme_param}#metrics" target="_self">Metrics</a>
-            <a href="?page=dashboard&theme={theme_param}#recommendations" target="_self">Recommendations</a>
-            <a href="?page=dashboard&theme={theme_param}#simulation" target="_self">Simulation</a>
-            <a href="?page=about&theme={theme_param}#about" target="_self">About</a>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_SIDEBAR_NAV_HTML.format(theme=theme_param), unsafe_allow_html=True)
     if compact_sidebar:
         st.caption("Expand sidebar to edit inputs.")
-    st.markdown("<div class='menu-item'><span>GreenDC Audit AI</span><span class='menu-badge'>OFFLINE</span></div>", unsafe_allow_html=True)
-    st.markdown(f'<div class="nav-list"><a href="?page=dashboard&theme={theme_param}#assistant" target="_self">Open GreenDC Audit AI</a></div>', unsafe_allow_html=True)
     simulate_web = st.toggle("Simulate Web Search (offline)", value=False)
     if "assistant_visible" not in st.session_state:
         st.session_state.assistant_visible = True
@@ -831,39 +1131,38 @@ with st.sidebar:
             for item in uploaded_docs:
                 saved_paths.append(save_uploaded_file(item, os.path.join(PROJECT_ROOT, "uploaded_docs")))
                 append_manifest(
-                    os.path.join(PROJECT_ROOT, "uploaded_docs", "manifest.json"),
+                    os.path.join(PROJECT_ROOT, "uploaded_docs", "manifest.jsonl"),
                     {"name": item.name, "saved_at": datetime.now(timezone.utc).isoformat()},
                 )
-                summary = summarize_document(item)
+            # Parse all documents concurrently; map keeps upload order so later
+            # documents still override earlier metrics.
+            # Workers get the script context so they can use the Streamlit cache.
+            with ThreadPoolExecutor(
+                max_workers=min(8, len(uploaded_docs)),
+                initializer=add_script_run_ctx,
+                initargs=(None, get_script_run_ctx()),
+            ) as executor:
+                parsed = list(executor.map(
+                    lambda item: _parse_document_bytes(item.name, item.getvalue()),
+                    uploaded_docs,
+                ))
+            for summary, full_text, metrics, status in parsed:
                 doc_summaries.append(summary)
-                if summary.startswith("PDF summary:"):
-                    full_text = extract_pdf_text(item)
-                    if full_text:
-                        metrics = extract_metrics_from_text(full_text)
-                        merged_metrics.update(metrics)
-                        doc_texts.append(full_text)
-                    doc_status.append("PDF fully readable")
-                elif summary.startswith("DOCX summary:"):
-                    full_text = extract_docx_text(item)
-                    if full_text:
-                        metrics = extract_metrics_from_text(full_text)
-                        merged_metrics.update(metrics)
-                        doc_texts.append(full_text)
-                    doc_status.append("DOCX fully readable")
-                elif summary.startswith("PDF uploaded but no readable text"):
-                    doc_status.append("PDF partially readable")
-                elif summary.startswith("PDF uploaded but could not be parsed"):
-                    doc_status.append("PDF partially readable")
-                elif summary.startswith("DOCX uploaded but no readable text"):
-                    doc_status.append("DOCX partially readable")
-                elif summary.startswith("DOCX uploaded but could not be parsed"):
-                    doc_status.append("DOCX partially readable")
+                merged_metrics.update(metrics)
+                if full_text:
+                    doc_texts.append(full_text)
+                if status:
+                    doc_status.append(status)
             st.success(f"Saved {len(saved_paths)} document(s) to local history.")
             if hf_token:
                 synced = 0
                 failed = 0
+                # One atomic commit for the whole batch: it either all syncs or none does.
+                try:
+                    result = upload_files_to_huggingface(saved_paths, hf_repo, hf_token)
+                except Exception as exc:
+                    result = str(exc)
                 for path in saved_paths:
-                    result = upload_to_huggingface(path, hf_repo, hf_token)
                     if result == "OK":
                         synced += 1
                         upload_status.append(f"{os.path.basename(path)} • Synced to HF")
@@ -887,107 +1186,117 @@ with st.sidebar:
                         os.remove(path)
                     except Exception:
                         upload_status.append(f"{os.path.basename(path)} • Local delete failed")
-            st.session_state["doc_summaries"] = doc_summaries
+            # Only the most recent uploads are kept; the joined text and its
+            # digest are stored once here instead of being rebuilt each rerun.
+            doc_texts = doc_texts[-_MAX_DOC_TEXTS:]
+            joined_docs = "\n".join(doc_texts)
+            st.session_state["doc_summaries"] = doc_summaries[-_MAX_DOC_TEXTS:]
             st.session_state["doc_status"] = doc_status
             st.session_state["doc_metrics"] = merged_metrics
             st.session_state["doc_texts"] = doc_texts
+            st.session_state["doc_texts_joined"] = joined_docs
+            st.session_state["doc_texts_hash"] = text_digest(joined_docs)
             st.session_state["upload_status"] = upload_status
         st.caption("No web scraping. Uses curated datasets and uploads only.")
-        if st.session_state.get("doc_summaries"):
-            st.markdown("<div class='menu-item'><span>Documents analyzed</span><span class='menu-badge'>OK</span></div>", unsafe_allow_html=True)
-            for summary in st.session_state["doc_summaries"][:3]:
-                st.caption(summary)
-        if st.session_state.get("doc_status"):
-            st.markdown("<div class='menu-item'><span>Doc status</span><span class='menu-badge'>INFO</span></div>", unsafe_allow_html=True)
-            for status in st.session_state["doc_status"][:3]:
-                st.caption(status)
-        if st.session_state.get("upload_status"):
-            st.markdown("<div class='menu-item'><span>Uploaded files</span><span class='menu-badge'>HF</span></div>", unsafe_allow_html=True)
-            for item in st.session_state["upload_status"][:5]:
-                st.caption(item)
+        # One header and one caption per section rather than one element per line.
+        for key, title, badge, limit in (
+            ("doc_summaries", "Documents analyzed", "OK", 3),
+            ("doc_status", "Doc status", "INFO", 3),
+            ("upload_status", "Uploaded files", "HF", 5),
+        ):
+            if st.session_state.get(key):
+                st.markdown(f"<div class='menu-item'><span>{title}</span><span class='menu-badge'>{badge}</span></div>", unsafe_allow_html=True)
+                st.caption("  \n".join(st.session_state[key][:limit]))
     doc_metrics_preview = st.session_state.get("doc_metrics", {})
     applied_fields = set(doc_metrics_preview.keys()) if doc_metrics_preview else set()
     applied_source_label = "Data from document" if doc_metrics_preview else ""
     if use_real_case and not doc_metrics_preview:
         applied_fields = set(case_study_defaults.keys())
         applied_source_label = "Case study dataset"
-    with st.expander("Energy Inputs", expanded=not compact_sidebar):
-        it_label = "IT Energy (MWh/year)" + (" ✅ Applied" if "it_energy_mwh" in applied_fields else "")
-        it_default = case_study_defaults.get("it_energy_mwh", 780.0)
-        it_energy_mwh = st.number_input(
-            it_label,
-            min_value=0.0,
-            value=float(doc_metrics_preview.get("it_energy_mwh", it_default)),
-            step=10.0,
-        )
-        if "it_energy_mwh" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-        total_label = "Total Energy (MWh/year)" + (" ✅ Applied" if "total_energy_mwh" in applied_fields else "")
-        total_default = case_study_defaults.get("total_energy_mwh", 1300.0)
-        total_energy_mwh = st.number_input(
-            total_label,
-            min_value=0.0,
-            value=float(doc_metrics_preview.get("total_energy_mwh", total_default)),
-            step=10.0,
-        )
-        if "total_energy_mwh" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-        cf_label = "Carbon Factor (kg CO2/kWh)" + (" ✅ Applied" if "carbon_factor" in applied_fields else "")
-        cf_default = case_study_defaults.get("carbon_factor", 0.30)
-        carbon_factor = st.number_input(
-            cf_label,
-            min_value=0.0,
-            value=float(doc_metrics_preview.get("carbon_factor", cf_default)),
-            step=0.01,
-        )
-        if "carbon_factor" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-    with st.expander("Infrastructure Inputs", expanded=not compact_sidebar):
-        servers_label = "Number of Servers" + (" ✅ Applied" if "servers" in applied_fields else "")
-        servers_default = int(case_study_defaults.get("servers", 320))
-        servers = st.number_input(
-            servers_label,
-            min_value=0,
-            value=int(doc_metrics_preview.get("servers", servers_default)) if doc_metrics_preview else servers_default,
-            step=10,
-        )
-        if "servers" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-        cpu_label = "Average CPU Utilization (%)" + (" ✅ Applied" if "cpu_utilization" in applied_fields else "")
-        cpu_default = case_study_defaults.get("cpu_utilization", 18.0)
-        cpu_utilization = st.number_input(
-            cpu_label,
-            min_value=0.0,
-            max_value=100.0,
-            value=float(doc_metrics_preview.get("cpu_utilization", cpu_default)),
-        )
-        if "cpu_utilization" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-        virt_label = "Virtualization Level (%)" + (" ✅ Applied" if "virtualization_level" in applied_fields else "")
-        virt_default = case_study_defaults.get("virtualization_level", 45.0)
-        virtualization_level = st.number_input(
-            virt_label,
-            min_value=0.0,
-            max_value=100.0,
-            value=float(doc_metrics_preview.get("virtualization_level", virt_default)),
-        )
-        if "virtualization_level" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-    with st.expander("Cooling & Facilities", expanded=not compact_sidebar):
-        cool_label = "Cooling Setpoint (°C)" + (" ✅ Applied" if "cooling_setpoint" in applied_fields else "")
-        cool_default = case_study_defaults.get("cooling_setpoint", 19.0)
-        cooling_setpoint = st.number_input(
-            cool_label,
-            min_value=10.0,
-            max_value=30.0,
-            value=float(doc_metrics_preview.get("cooling_setpoint", cool_default)),
-        )
-        if "cooling_setpoint" in applied_fields and applied_source_label:
-            st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
-        aisle_default = bool(case_study_defaults.get("aisle_containment", False))
-        aisle_containment = st.checkbox("Hot/Cold Aisle Containment in place", value=aisle_default)
+    # Edits to the audit inputs are applied together on submit instead of
+    # rerunning the whole dashboard after every keystroke.
+    with st.form("audit_inputs", border=False):
+        with st.expander("Energy Inputs", expanded=not compact_sidebar):
+            it_label = "IT Energy (MWh/year)" + (" ✅ Applied" if "it_energy_mwh" in applied_fields else "")
+            it_default = case_study_defaults.get("it_energy_mwh", 780.0)
+            it_energy_mwh = st.number_input(
+                it_label,
+                min_value=0.0,
+                value=float(doc_metrics_preview.get("it_energy_mwh", it_default)),
+                step=10.0,
+            )
+            if "it_energy_mwh" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+            total_label = "Total Energy (MWh/year)" + (" ✅ Applied" if "total_energy_mwh" in applied_fields else "")
+            total_default = case_study_defaults.get("total_energy_mwh", 1300.0)
+            total_energy_mwh = st.number_input(
+                total_label,
+                min_value=0.0,
+                value=float(doc_metrics_preview.get("total_energy_mwh", total_default)),
+                step=10.0,
+            )
+            if "total_energy_mwh" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+            cf_label = "Carbon Factor (kg CO2/kWh)" + (" ✅ Applied" if "carbon_factor" in applied_fields else "")
+            cf_default = case_study_defaults.get("carbon_factor", 0.30)
+            carbon_factor = st.number_input(
+                cf_label,
+                min_value=0.0,
+                value=float(doc_metrics_preview.get("carbon_factor", cf_default)),
+                step=0.01,
+            )
+            if "carbon_factor" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+        with st.expander("Infrastructure Inputs", expanded=not compact_sidebar):
+            servers_label = "Number of Servers" + (" ✅ Applied" if "servers" in applied_fields else "")
+            servers_default = int(case_study_defaults.get("servers", 320))
+            servers = st.number_input(
+                servers_label,
+                min_value=0,
+                value=int(doc_metrics_preview.get("servers", servers_default)) if doc_metrics_preview else servers_default,
+                step=10,
+            )
+            if "servers" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+            cpu_label = "Average CPU Utilization (%)" + (" ✅ Applied" if "cpu_utilization" in applied_fields else "")
+            cpu_default = case_study_defaults.get("cpu_utilization", 18.0)
+            cpu_utilization = st.number_input(
+                cpu_label,
+                min_value=0.0,
+                max_value=100.0,
+                value=float(doc_metrics_preview.get("cpu_utilization", cpu_default)),
+            )
+            if "cpu_utilization" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+            virt_label = "Virtualization Level (%)" + (" ✅ Applied" if "virtualization_level" in applied_fields else "")
+            virt_default = case_study_defaults.get("virtualization_level", 45.0)
+            virtualization_level = st.number_input(
+                virt_label,
+                min_value=0.0,
+                max_value=100.0,
+                value=float(doc_metrics_preview.get("virtualization_level", virt_default)),
+            )
+            if "virtualization_level" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+        with st.expander("Cooling & Facilities", expanded=not compact_sidebar):
+            cool_label = "Cooling Setpoint (°C)" + (" ✅ Applied" if "cooling_setpoint" in applied_fields else "")
+            cool_default = case_study_defaults.get("cooling_setpoint", 19.0)
+            cooling_setpoint = st.number_input(
+                cool_label,
+                min_value=10.0,
+                max_value=30.0,
+                value=float(doc_metrics_preview.get("cooling_setpoint", cool_default)),
+            )
+            if "cooling_setpoint" in applied_fields and applied_source_label:
+                st.markdown(f"<span class='applied-badge'>Applied • {applied_source_label}</span>", unsafe_allow_html=True)
+            aisle_default = bool(case_study_defaults.get("aisle_containment", False))
+            aisle_containment = st.checkbox("Hot/Cold Aisle Containment in place", value=aisle_default)
+        st.form_submit_button("Apply inputs", width="stretch")
 
+# Document state read once per run; the sidebar above is the only writer.
 doc_metrics = st.session_state.get("doc_metrics", {})
+doc_summaries = st.session_state.get("doc_summaries", [])
+doc_texts = st.session_state.get("doc_texts", [])
 case_defaults = case_study_defaults if use_real_case else {}
 workload_metrics = {
     "latency_ms": doc_metrics.get("latency_ms"),
@@ -1042,204 +1351,232 @@ elif use_real_case:
     applied_params.append(f"CPU utilization applied from case study: {cpu_utilization:.1f}%")
     applied_params.append(f"Cooling setpoint applied from case study: {cooling_setpoint:.1f} °C")
 
-theme = "dark" if dark_mode else "light"
-if dark_mode:
-    bg = "radial-gradient(140% 140% at 0% 0%, #0f1d3b 0%, #0a1022 55%, #060914 100%)"
-    text = "#e9edff"
-    muted = "#c9d4ff"
-    panel = "rgba(18, 26, 51, 0.92)"
-    panel_border = "rgba(255,255,255,0.12)"
-    card_bg = "linear-gradient(180deg, rgba(24, 36, 72, 0.98) 0%, rgba(12, 20, 40, 0.98) 100%)"
-    hover_bg = "rgba(28, 40, 78, 0.95)"
-else:
-    bg = "radial-gradient(120% 120% at 0% 0%, #b9c4d3 0%, #b2bfce 55%, #a9b7c7 100%)"
-    text = "#0b1324"
-    muted = "#4b5563"
-    panel = "rgba(198, 210, 226, 0.98)"
-    panel_border = "rgba(15, 23, 42, 0.24)"
-    card_bg = "linear-gradient(180deg, rgba(202, 214, 229, 0.98) 0%, rgba(192, 205, 222, 0.98) 100%)"
-    hover_bg = "rgba(176, 194, 214, 0.96)"
-text_shadow = "0 2px 6px rgba(0,0,0,0.25)" if dark_mode else "none"
 
-st.markdown(
-    f"""
+# Theme-dependent CSS values as (dark, light). _BASE_CSS only refers to them
+# through var(--name), so a theme switch re-sends just the :root block below.
+_THEME_TOKENS = {
+    "bg": (
+        "radial-gradient(140% 140% at 0% 0%, #0f1d3b 0%, #0a1022 55%, #060914 100%)",
+        "radial-gradient(120% 120% at 0% 0%, #b9c4d3 0%, #b2bfce 55%, #a9b7c7 100%)",
+    ),
+    "text": ("#e9edff", "#0b1324"),
+    "muted": ("#c9d4ff", "#4b5563"),
+    "panel": ("rgba(18, 26, 51, 0.92)", "rgba(198, 210, 226, 0.98)"),
+    "panel-border": ("rgba(255,255,255,0.12)", "rgba(15, 23, 42, 0.24)"),
+    "card-bg": (
+        "linear-gradient(180deg, rgba(24, 36, 72, 0.98) 0%, rgba(12, 20, 40, 0.98) 100%)",
+        "linear-gradient(180deg, rgba(202, 214, 229, 0.98) 0%, rgba(192, 205, 222, 0.98) 100%)",
+    ),
+    "hover-bg": ("rgba(28, 40, 78, 0.95)", "rgba(176, 194, 214, 0.96)"),
+    "text-shadow": ("0 2px 6px rgba(0,0,0,0.25)", "none"),
+    "case-border": ("rgba(43, 214, 115, 0.6)", "rgba(43, 214, 115, 0.45)"),
+    "case-head-bg": ("rgba(28, 80, 52, 0.45)", "rgba(43, 214, 115, 0.18)"),
+    "case-head-text": ("#bff7d4", "#0b3d1e"),
+    "case-cell-bg": ("transparent", "rgba(255, 255, 255, 0.85)"),
+    "icon-color": ("#bcd0ff", "#1f2937"),
+    "focus-ring": ("rgba(126, 166, 255, 0.45)", "rgba(76, 130, 255, 0.35)"),
+    "hero-shadow": ("0 10px 30px rgba(0,0,0,0.35)", "0 8px 18px rgba(15,23,42,0.12)"),
+    "badge-solid-bg": ("rgba(76, 214, 180, 0.18)", "rgba(76, 214, 180, 0.25)"),
+    "badge-solid-border": ("rgba(76, 214, 180, 0.45)", "rgba(76, 214, 180, 0.55)"),
+    "badge-solid-text": ("#c9fff2", "#0b3d1e"),
+    "glass-shadow": ("0 12px 24px rgba(0,0,0,0.25)", "0 8px 16px rgba(15,23,42,0.12)"),
+    "metric-card-shadow": ("0 12px 28px rgba(0,0,0,0.45)", "0 8px 18px rgba(15,23,42,0.12)"),
+    "menu-item-bg": ("rgba(20, 30, 60, 0.6)", "rgba(238, 242, 249, 0.95)"),
+    "menu-badge-bg": ("rgba(120, 210, 255, 0.15)", "rgba(76, 214, 180, 0.18)"),
+    "menu-badge-border": ("rgba(120, 210, 255, 0.35)", "rgba(76, 214, 180, 0.45)"),
+    "table-bg": ("rgba(20, 30, 60, 0.35)", "rgba(182, 198, 217, 0.98)"),
+    "grid-bg": ("rgba(16, 24, 48, 0.9)", "rgba(190, 205, 222, 0.98)"),
+    "tab-text": ("#c9d4ff", "#334155"),
+    "tab-bg": ("rgba(20, 30, 60, 0.5)", "rgba(245, 248, 253, 0.95)"),
+    "tab-border": ("rgba(255,255,255,0.08)", "rgba(15,23,42,0.12)"),
+    "tab-active-bg": ("rgba(52, 75, 140, 0.7)", "rgba(226, 236, 250, 0.95)"),
+    "tab-active-text": ("#ffffff", "#0b1324"),
+    "tab-active-border": ("rgba(255,255,255,0.2)", "rgba(15,23,42,0.15)"),
+    "tab-active-shadow": ("0 6px 16px rgba(0,0,0,0.35)", "0 6px 14px rgba(15,23,42,0.12)"),
+    "card-shadow": ("0 10px 20px rgba(0,0,0,0.35)", "0 8px 16px rgba(15,23,42,0.12)"),
+    "applied-badge-text": ("#7ee6b4", "#0b3d1e"),
+    "kpi-source-text": ("#b6f5dc", "#1f5d3a"),
+    "brand-badge-bg": ("rgba(43, 214, 115, 0.18)", "rgba(43, 214, 115, 0.22)"),
+    "brand-badge-border": ("rgba(43, 214, 115, 0.35)", "rgba(43, 214, 115, 0.45)"),
+    "brand-badge-shadow": ("0 0 10px rgba(126,230,180,0.35)", "0 4px 10px rgba(15,23,42,0.12)"),
+}
+
+_BASE_CSS = """
     <style>
-    html {{
+    :root {
+        --case-text: var(--text);
+    }
+    html {
         scroll-behavior: smooth;
-    }}
-    :root {{
-        --case-text: {text};
-        --case-border: {"rgba(43, 214, 115, 0.6)" if dark_mode else "rgba(43, 214, 115, 0.45)"};
-        --case-head-bg: {"rgba(28, 80, 52, 0.45)" if dark_mode else "rgba(43, 214, 115, 0.18)"};
-        --case-head-text: {"#bff7d4" if dark_mode else "#0b3d1e"};
-        --case-cell-bg: {"transparent" if dark_mode else "rgba(255, 255, 255, 0.85)"};
-        --icon-color: {"#bcd0ff" if dark_mode else "#1f2937"};
-    }}
-    .stApp {{
-        background: {bg};
-    }}
-    body, [data-testid="stAppViewContainer"] {{
-        color: {text};
-    }}
-    [data-testid="stHeader"], [data-testid="stToolbar"], [data-testid="stDecoration"] {{
-        background: {panel} !important;
-        border-bottom: 1px solid {panel_border} !important;
-    }}
-    [data-testid="stAppViewContainer"], .block-container {{
+    }
+    .stApp {
+        background: var(--bg);
+    }
+    body, [data-testid="stAppViewContainer"] {
+        color: var(--text);
+    }
+    [data-testid="stHeader"], [data-testid="stToolbar"], [data-testid="stDecoration"] {
+        background: var(--panel) !important;
+        border-bottom: 1px solid var(--panel-border) !important;
+    }
+    [data-testid="stAppViewContainer"], .block-container {
         background: transparent !important;
-    }}
-    [data-testid="stAppViewContainer"]::before {{
+    }
+    [data-testid="stAppViewContainer"]::before {
         content: "";
         position: fixed;
         inset: 0;
-        background: {bg};
+        background: var(--bg);
         z-index: -1;
-    }}
-    [data-testid="stSidebar"] {{
-        background: {panel} !important;
-    }}
-    h1, h2, h3, h4, h5, p, li, label, span, div {{
-        color: {text};
-    }}
-    a {{ color: {muted}; }}
-    [data-testid="stMetricValue"] {{ color: {text} !important; text-shadow: {text_shadow}; }}
-    [data-testid="stMetricLabel"] {{ color: {muted} !important; }}
-    input, textarea, select, button {{
-        background: {panel} !important;
-        color: {text} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    input:hover, textarea:hover, select:hover, button:hover {{
-        background: {hover_bg} !important;
-        color: {text} !important;
-    }}
-    input:focus, textarea:focus, select:focus {{
+    }
+    [data-testid="stSidebar"] {
+        background: var(--panel) !important;
+        color: var(--text);
+    }
+    /* Text elements only: divs and spans inherit the color from body. */
+    h1, h2, h3, h4, h5, p, li, label {
+        color: var(--text);
+    }
+    a { color: var(--muted); }
+    [data-testid="stMetricValue"] { color: var(--text) !important; text-shadow: var(--text-shadow); }
+    [data-testid="stMetricLabel"] { color: var(--muted) !important; }
+    input, textarea, select, button {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    input:hover, textarea:hover, select:hover, button:hover {
+        background: var(--hover-bg) !important;
+        color: var(--text) !important;
+    }
+    input:focus, textarea:focus, select:focus {
         outline: none !important;
-        box-shadow: 0 0 0 2px {"rgba(126, 166, 255, 0.45)" if dark_mode else "rgba(76, 130, 255, 0.35)"} !important;
-    }}
-    [data-baseweb="select"] * {{
-        color: {text} !important;
-    }}
-    [data-baseweb="input"] input {{
-        background: {panel} !important;
-        color: {text} !important;
-    }}
-    [data-baseweb="select"] div {{
-        background: {panel} !important;
-        color: {text} !important;
-    }}
-    [data-baseweb="popover"] {{
-        background: {panel} !important;
-    }}
-    [data-baseweb="popover"] > div {{
-        background: {panel} !important;
-        color: {text} !important;
-    }}
-    [data-baseweb="popover"] * {{
-        color: {text} !important;
+        box-shadow: 0 0 0 2px var(--focus-ring) !important;
+    }
+    /* Element lists instead of universal '*': :where() keeps the
+       specificity of 'X *' so the cascade is unchanged. */
+    [data-baseweb="select"] :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
+    }
+    [data-baseweb="input"] input {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+    }
+    [data-baseweb="select"] div {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+    }
+    [data-baseweb="popover"] {
+        background: var(--panel) !important;
+    }
+    [data-baseweb="popover"] > div {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+    }
+    [data-baseweb="popover"] :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
         background-color: transparent !important;
-    }}
-    [data-baseweb="tooltip"], [data-baseweb="modal"], [data-testid="stModal"] {{
-        background: {panel} !important;
-        color: {text} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [data-baseweb="modal"] * {{
-        color: {text} !important;
-        background: transparent !important;
-    }}
-    [role="dialog"] {{
-        background: {panel} !important;
-        color: {text} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [role="dialog"] * {{
-        color: {text} !important;
+    }
+    [data-baseweb="tooltip"], [data-baseweb="modal"], [data-testid="stModal"] {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [data-baseweb="modal"] :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
         background: transparent !important;
-    }}
-    [data-baseweb="layer"] {{
+    }
+    [role="dialog"] {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [role="dialog"] :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
         background: transparent !important;
-    }}
-    [data-baseweb="menu"] {{
-        background: {panel} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [role="menu"] {{
-        background: {panel} !important;
-        color: {text} !important;
-    }}
-    [role="menu"] li, [role="menuitem"] {{
-        background: {panel} !important;
-        color: {text} !important;
-    }}
-    [role="menuitem"]:hover {{
-        background: {hover_bg} !important;
-    }}
-    [data-testid="stAppMenuPopover"], [data-testid="stPopoverBody"] {{
-        background: {panel} !important;
-        color: {text} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [data-testid="stAppMenuPopover"] * {{
-        color: {text} !important;
+    }
+    [data-baseweb="layer"] {
         background: transparent !important;
-    }}
-    [data-testid="stAppMenuPopover"] div[role="menuitem"] {{
-        background: {panel} !important;
-        color: {text} !important;
-    }}
-    [data-testid="stAppMenuPopover"] div[role="menuitem"]:hover {{
-        background: {hover_bg} !important;
-        color: {text} !important;
-    }}
-    [data-testid="stAppMenuPopover"] hr {{
-        border-color: {panel_border} !important;
-    }}
-    [data-testid="stAppMenuPopover"] kbd {{
-        background: {panel} !important;
-        color: {text} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [data-testid="stAppMenuPopover"] a:hover {{
-        background: {hover_bg} !important;
-    }}
-    [data-testid="stAppToolbar"] button {{
-        background: {panel} !important;
-        color: {text} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [data-testid="stAppToolbar"] svg {{
-        fill: {text} !important;
-        color: {text} !important;
-    }}
-    [data-testid="stToggle"] div {{
-        background: {panel} !important;
-        border: 1px solid {panel_border} !important;
-    }}
-    [data-testid="stRadio"] div {{
+    }
+    [data-baseweb="menu"] {
+        background: var(--panel) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [role="menu"] {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+    }
+    [role="menu"] li, [role="menuitem"] {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+    }
+    [role="menuitem"]:hover {
+        background: var(--hover-bg) !important;
+    }
+    [data-testid="stAppMenuPopover"], [data-testid="stPopoverBody"] {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [data-testid="stAppMenuPopover"] :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
         background: transparent !important;
-    }}
-    [data-testid="stRadio"] label {{
-        color: {text} !important;
-    }}
-    .section-title {{
-        font-size: 18px;
-        font-weight: 700;
+    }
+    [data-testid="stAppMenuPopover"] div[role="menuitem"] {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+    }
+    [data-testid="stAppMenuPopover"] div[role="menuitem"]:hover {
+        background: var(--hover-bg) !important;
+        color: var(--text) !important;
+    }
+    [data-testid="stAppMenuPopover"] hr {
+        border-color: var(--panel-border) !important;
+    }
+    [data-testid="stAppMenuPopover"] kbd {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [data-testid="stAppMenuPopover"] a:hover {
+        background: var(--hover-bg) !important;
+    }
+    [data-testid="stAppToolbar"] button {
+        background: var(--panel) !important;
+        color: var(--text) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [data-testid="stAppToolbar"] svg {
+        fill: var(--text) !important;
+        color: var(--text) !important;
+    }
+    [data-testid="stToggle"] div {
+        background: var(--panel) !important;
+        border: 1px solid var(--panel-border) !important;
+    }
+    [data-testid="stRadio"] div {
+        background: transparent !important;
+    }
+    [data-testid="stRadio"] label {
+        color: var(--text) !important;
+    }
+    .section-title {
+        font-size: 22px;
+        font-weight: 800;
         letter-spacing: 0.02em;
-        margin: 6px 0 10px 0;
-        color: {text};
+        margin: 18px 0 12px 0;
+        color: var(--text);
         text-shadow: 0 2px 6px rgba(0,0,0,0.4);
-    }}
-    .section-title {{
         border-left: 4px solid #7ee6b4;
         padding-left: 10px;
-    }}
-    .topbar {{
+    }
+    .topbar {
         position: sticky;
         top: 0;
         z-index: 999;
-        background: {panel};
+        background: var(--panel);
         backdrop-filter: blur(10px);
+        will-change: transform, backdrop-filter;
         border: 1px solid rgba(126, 230, 180, 0.45);
         border-radius: 14px;
         padding: 14px 20px;
@@ -1250,30 +1587,30 @@ st.markdown(
         justify-content: space-between;
         gap: 12px;
         overflow: visible;
-    }}
-    .nav {{
+    }
+    .nav {
         display: flex;
         align-items: center;
         gap: 10px;
         position: relative;
         overflow: visible;
         z-index: 1200;
-    }}
-    .logo {{
+    }
+    .logo {
         display: flex;
         align-items: center;
         gap: 8px;
         font-weight: 800;
         letter-spacing: 0.02em;
-        color: {text};
+        color: var(--text);
         font-size: 30px;
         flex-wrap: wrap;
-    }}
-    .logo .title-emoji {{
+    }
+    .logo .title-emoji {
         font-size: 30px;
         line-height: 1;
-    }}
-    .logo .title-frame {{
+    }
+    .logo .title-frame {
         display: inline-flex;
         align-items: center;
         gap: 10px;
@@ -1281,8 +1618,8 @@ st.markdown(
         border-radius: 6px;
         background: rgba(12, 58, 36, 0.85);
         border: 1px solid rgba(43, 214, 115, 0.45);
-    }}
-    .logo .title-strong {{
+    }
+    .logo .title-strong {
         display: inline-flex;
         align-items: center;
         gap: 8px;
@@ -1294,46 +1631,46 @@ st.markdown(
         font-weight: 900;
         font-size: 30px;
         text-shadow: none;
-    }}
-    .title-frame svg {{
+    }
+    .title-frame svg {
         width: 30px;
         height: 30px;
-    }}
-    .title-frame svg path, .title-frame svg circle {{
+    }
+    .title-frame svg path, .title-frame svg circle {
         fill: #ffffff !important;
         stroke: #ffffff !important;
-    }}
-    .logo span {{
-        color: {muted};
+    }
+    .logo span {
+        color: var(--muted);
         font-weight: 600;
         font-size: 12px;
         margin-left: 4px;
-    }}
-    .nav a {{
+    }
+    .nav a {
         text-decoration: none;
         margin-right: 12px;
         padding: 6px 10px;
         border-radius: 10px;
-        background: {panel};
+        background: var(--panel);
         border: 1px solid rgba(126, 230, 180, 0.35);
-        color: {text};
+        color: var(--text);
         font-size: 18px;
         font-weight: 700;
-    }}
-    .nav a:hover {{
-        background: {hover_bg};
-        color: {text};
-    }}
-    .dropdown {{
+    }
+    .nav a:hover {
+        background: var(--hover-bg);
+        color: var(--text);
+    }
+    .dropdown {
         position: relative;
         display: inline-block;
         overflow: visible;
-    }}
-    .dropdown-content {{
+    }
+    .dropdown-content {
         display: none;
         position: absolute;
         min-width: 160px;
-        background: {panel};
+        background: var(--panel);
         border: 1px solid rgba(126, 230, 180, 0.35);
         border-radius: 12px;
         box-shadow: 0 10px 20px rgba(0,0,0,0.35);
@@ -1341,51 +1678,51 @@ st.markdown(
         z-index: 2000;
         right: 0;
         overflow: visible;
-    }}
-    .dropdown:hover .dropdown-content {{
+    }
+    .dropdown:hover .dropdown-content {
         display: block;
-    }}
-    .dropdown .dropdown-content .dropdown {{
+    }
+    .dropdown .dropdown-content .dropdown {
         position: relative;
-    }}
-    .dropdown .dropdown-content .dropdown .dropdown-content {{
+    }
+    .dropdown .dropdown-content .dropdown .dropdown-content {
         left: -170px;
         top: 0;
         right: auto;
-    }}
-    .dropdown-content a {{
+    }
+    .dropdown-content a {
         display: block;
         padding: 6px 10px;
         margin: 4px 0;
         border-radius: 8px;
-        background: {panel};
-        color: {text};
+        background: var(--panel);
+        color: var(--text);
         text-decoration: none;
         font-size: 12px;
         font-weight: 600;
-    }}
-    .dropdown-content a:hover {{
-        background: {hover_bg};
-        color: {text};
-    }}
-    .subtle {{
+    }
+    .dropdown-content a:hover {
+        background: var(--hover-bg);
+        color: var(--text);
+    }
+    .subtle {
         opacity: 0.8;
         font-size: 13px;
-    }}
-    .hero {{
-        background: {card_bg};
-        color: {text};
+    }
+    .hero {
+        background: var(--card-bg);
+        color: var(--text);
         padding: 28px 32px;
         border-radius: 16px;
-        box-shadow: {"0 10px 30px rgba(0,0,0,0.35)" if dark_mode else "0 8px 18px rgba(15,23,42,0.12)"};
-        border: 1px solid {panel_border};
+        box-shadow: var(--hero-shadow);
+        border: 1px solid var(--panel-border);
         margin-bottom: 20px;
         position: relative;
         overflow: hidden;
-    }}
-    .hero h1 {{ margin: 0 0 6px 0; font-size: 38px; }}
-    .hero p {{ margin: 0; opacity: 0.9; font-size: 15px; }}
-    .hero::after {{
+    }
+    .hero h1 { margin: 0 0 6px 0; font-size: 38px; }
+    .hero p { margin: 0; opacity: 0.9; font-size: 15px; }
+    .hero::after {
         content: "";
         position: absolute;
         right: -80px;
@@ -1395,205 +1732,206 @@ st.markdown(
         border-radius: 50%;
         background: radial-gradient(circle, rgba(110,140,255,0.35), rgba(110,140,255,0.0) 60%);
         filter: blur(2px);
-    }}
-    .badge {{
+        transform: translate3d(0, 0, 0);
+    }
+    .badge {
         display: inline-block;
         padding: 6px 12px;
         border-radius: 999px;
-        background: {panel};
-        border: 1px solid {panel_border};
-        color: {text};
+        background: var(--panel);
+        border: 1px solid var(--panel-border);
+        color: var(--text);
         font-size: 14px;
         letter-spacing: 0.04em;
         margin-right: 8px;
-    }}
-    .badge-solid {{
-        background: {"rgba(76, 214, 180, 0.18)" if dark_mode else "rgba(76, 214, 180, 0.25)"};
-        border: 1px solid {"rgba(76, 214, 180, 0.45)" if dark_mode else "rgba(76, 214, 180, 0.55)"};
-        color: {"#c9fff2" if dark_mode else "#0b3d1e"};
-    }}
-    .glass {{
-        background: {panel};
-        backdrop-filter: blur(10px);
-        border: 1px solid {panel_border};
-        box-shadow: {"0 12px 24px rgba(0,0,0,0.25)" if dark_mode else "0 8px 16px rgba(15,23,42,0.12)"};
+    }
+    .badge-solid {
+        background: var(--badge-solid-bg);
+        border: 1px solid var(--badge-solid-border);
+        color: var(--badge-solid-text);
+    }
+    .glass {
+        /* --panel is 92-98% opaque, so a backdrop blur would barely show. */
+        background: var(--panel);
+        border: 1px solid var(--panel-border);
+        box-shadow: var(--glass-shadow);
         border-radius: 16px;
         padding: 16px 18px;
-    }}
-    .metric-card {{
-        background: {card_bg};
-        color: {text};
+    }
+    .glass + .glass {
+        margin-top: 16px;
+    }
+    .metric-card {
+        background: var(--card-bg);
+        color: var(--text);
         padding: 16px 18px;
         border-radius: 14px;
-        box-shadow: {"0 12px 28px rgba(0,0,0,0.45)" if dark_mode else "0 8px 18px rgba(15,23,42,0.12)"};
-        border: 1px solid {panel_border};
-    }}
-    .metric-card h3 {{ margin: 0 0 6px 0; font-size: 15px; text-transform: uppercase; letter-spacing: 0.1em; color: {muted}; }}
-    .metric-card .value {{ font-size: 34px; font-weight: 800; color: {text}; text-shadow: {text_shadow}; }}
-    .stSidebar > div:first-child {{
-        background: {panel};
-        border-right: 1px solid {panel_border};
-    }}
-    .stSidebar label, .stSidebar span, .stSidebar p {{
-        color: {text} !important;
-    }}
-    .sidebar-title {{
+        box-shadow: var(--metric-card-shadow);
+        border: 1px solid var(--panel-border);
+    }
+    .metric-card h3 { margin: 0 0 6px 0; font-size: 15px; text-transform: uppercase; letter-spacing: 0.1em; color: var(--muted); }
+    .metric-card .value { font-size: 34px; font-weight: 800; color: var(--text); text-shadow: var(--text-shadow); }
+    .metric-row {
+        display: grid;
+        grid-template-columns: repeat(3, minmax(0, 1fr));
+        gap: 1rem;
+    }
+    .stSidebar > div:first-child {
+        background: var(--panel);
+        border-right: 1px solid var(--panel-border);
+    }
+    /* Spans inherit the sidebar color; only Streamlit's own label/p colors need overriding. */
+    .stSidebar label, .stSidebar p {
+        color: var(--text) !important;
+    }
+    .sidebar-title {
         font-weight: 800;
         font-size: 15px;
         letter-spacing: 0.08em;
         margin-bottom: 8px;
-        color: {muted};
-    }}
-    .stSidebar [data-testid="stExpander"] {{
-        background: {panel};
+        color: var(--muted);
+    }
+    .stSidebar [data-testid="stExpander"] {
+        background: var(--panel);
         border-radius: 12px;
-        border: 1px solid {panel_border};
+        border: 1px solid var(--panel-border);
         padding: 6px;
-    }}
-    .stSidebar [data-testid="stExpander"] summary {{
-        background: {panel} !important;
-        color: {text} !important;
+    }
+    .stSidebar [data-testid="stExpander"] summary {
+        background: var(--panel) !important;
+        color: var(--text) !important;
         border-radius: 10px;
-    }}
-    .stSidebar [data-testid="stExpander"] summary:hover {{
-        background: {hover_bg} !important;
-    }}
-    .stSidebar [data-testid="stExpander"] summary {{
-        color: #e9edff;
         font-weight: 600;
-    }}
-    .stSidebar [role="radiogroup"] label {{
-        color: {muted} !important;
+    }
+    .stSidebar [data-testid="stExpander"] summary:hover {
+        background: var(--hover-bg) !important;
+    }
+    .stSidebar [role="radiogroup"] label {
+        color: var(--muted) !important;
         font-weight: 600;
-    }}
-    .stSidebar [role="radiogroup"] label[data-selected="true"] {{
-        color: {text} !important;
-    }}
-    .icon-nav {{
+    }
+    .stSidebar [role="radiogroup"] label[data-selected="true"] {
+        color: var(--text) !important;
+    }
+    .icon-nav {
         display: grid;
         grid-template-columns: repeat(3, 1fr);
         gap: 8px;
         margin-bottom: 8px;
-    }}
-    .icon-nav a {{
+    }
+    .icon-nav a {
         display: inline-flex;
         justify-content: center;
         align-items: center;
         height: 34px;
         border-radius: 10px;
-        background: {panel};
-        border: 1px solid {panel_border};
+        background: var(--panel);
+        border: 1px solid var(--panel-border);
         text-decoration: none;
-    }}
-    .menu-item {{
+    }
+    .menu-item {
         display: flex;
         align-items: center;
         gap: 8px;
         padding: 6px 8px;
         border-radius: 10px;
-        background: {"rgba(20, 30, 60, 0.6)" if dark_mode else "rgba(238, 242, 249, 0.95)"};
+        background: var(--menu-item-bg);
         border: 1px solid rgba(126, 230, 180, 0.35);
-        color: {text};
+        color: var(--text);
         margin-bottom: 6px;
         font-size: 12px;
-    }}
-    .menu-badge {{
+    }
+    .menu-badge {
         margin-left: auto;
         font-size: 10px;
         padding: 2px 8px;
         border-radius: 999px;
-        background: {"rgba(120, 210, 255, 0.15)" if dark_mode else "rgba(76, 214, 180, 0.18)"};
-        border: 1px solid {"rgba(120, 210, 255, 0.35)" if dark_mode else "rgba(76, 214, 180, 0.45)"};
-        color: {text};
-    }}
-    .nav-list a {{
+        background: var(--menu-badge-bg);
+        border: 1px solid var(--menu-badge-border);
+        color: var(--text);
+    }
+    .nav-list a {
         display: block;
         padding: 6px 10px;
         margin: 4px 0;
         border-radius: 10px;
-        background: {panel};
+        background: var(--panel);
         border: 1px solid rgba(126, 230, 180, 0.28);
-        color: {text};
+        color: var(--text);
         text-decoration: none;
         font-size: 12px;
         font-weight: 600;
-    }}
-    .nav-list a:hover {{
-        background: {hover_bg};
-        color: {text};
-    }}
-    .stDataFrame, .stTable {{
-        background: {"rgba(20, 30, 60, 0.35)" if dark_mode else "rgba(182, 198, 217, 0.98)"};
+    }
+    .nav-list a:hover {
+        background: var(--hover-bg);
+        color: var(--text);
+    }
+    .stDataFrame, .stTable {
+        background: var(--table-bg);
         border-radius: 12px;
         padding: 6px;
-    }}
-    .stDataFrame div[role="grid"] {{
-        background: {"rgba(16, 24, 48, 0.9)" if dark_mode else "rgba(190, 205, 222, 0.98)"};
-        color: {"#e9edff" if dark_mode else "#0b1324"};
-    }}
-    .stDataFrame div[role="grid"] * {{
-        color: {"#e9edff" if dark_mode else "#0b1324"} !important;
-    }}
-    .stTabs [data-baseweb="tab"] {{
-        color: {"#c9d4ff" if dark_mode else "#334155"};
-        background: {"rgba(20, 30, 60, 0.5)" if dark_mode else "rgba(245, 248, 253, 0.95)"};
+    }
+    .stDataFrame div[role="grid"] {
+        background: var(--grid-bg);
+        color: var(--text);
+    }
+    .stDataFrame div[role="grid"] :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
+    }
+    .stTabs [data-baseweb="tab"] {
+        color: var(--tab-text);
+        background: var(--tab-bg);
         border-radius: 12px;
         margin-right: 6px;
         padding: 8px 14px;
-        border: 1px solid {"rgba(255,255,255,0.08)" if dark_mode else "rgba(15,23,42,0.12)"};
-    }}
-    .stTabs [aria-selected="true"] {{
-        background: {"rgba(52, 75, 140, 0.7)" if dark_mode else "rgba(226, 236, 250, 0.95)"};
-        color: {"#ffffff" if dark_mode else "#0b1324"};
-        border: 1px solid {"rgba(255,255,255,0.2)" if dark_mode else "rgba(15,23,42,0.15)"};
-        box-shadow: {"0 6px 16px rgba(0,0,0,0.35)" if dark_mode else "0 6px 14px rgba(15,23,42,0.12)"};
-    }}
-    .footer {{
+        border: 1px solid var(--tab-border);
+    }
+    .stTabs [aria-selected="true"] {
+        background: var(--tab-active-bg);
+        color: var(--tab-active-text);
+        border: 1px solid var(--tab-active-border);
+        box-shadow: var(--tab-active-shadow);
+    }
+    .footer {
         margin-top: 20px;
         padding: 12px 16px;
         border-radius: 12px;
-        background: {panel};
-        border: 1px solid {panel_border};
+        background: var(--panel);
+        border: 1px solid var(--panel-border);
         font-size: 12px;
-        color: {muted};
-    }}
-    .section {{
-        background: {panel};
+        color: var(--muted);
+    }
+    .section {
+        background: var(--panel);
         border: 1px solid rgba(126, 230, 180, 0.25);
         border-radius: 16px;
         padding: 18px;
         margin-bottom: 16px;
-        box-shadow: {"0 10px 20px rgba(0,0,0,0.35)" if dark_mode else "0 8px 16px rgba(15,23,42,0.12)"};
-    }}
-    .section + .section {{
+        box-shadow: var(--card-shadow);
+    }
+    .section + .section {
         margin-top: 12px;
-    }}
-    .section-title {{
-        margin-top: 18px;
-        margin-bottom: 12px;
-        font-size: 22px;
-        font-weight: 800;
-    }}
-    [id] {{
+    }
+    [id] {
         scroll-margin-top: 90px;
-    }}
-    :target {{
+    }
+    :target {
         outline: 2px solid rgba(43, 214, 115, 0.6);
         outline-offset: 6px;
         border-radius: 12px;
         box-shadow: 0 0 0 4px rgba(43, 214, 115, 0.12);
-    }}
-    .soft-divider {{
+    }
+    .soft-divider {
         height: 1px;
-        background: {panel_border};
+        background: var(--panel-border);
         margin: 14px 0;
-    }}
-    .applied-badge {{
-        color: {"#7ee6b4" if dark_mode else "#0b3d1e"};
+    }
+    .applied-badge {
+        color: var(--applied-badge-text);
         font-weight: 700;
         font-size: 11px;
-    }}
-    .kpi-applied {{
+    }
+    .kpi-applied {
         display: inline-block;
         margin-left: 6px;
         padding: 2px 6px;
@@ -1603,187 +1941,327 @@ st.markdown(
         color: #0b1a14;
         background: #7ee6b4;
         box-shadow: 0 0 0 1px rgba(126, 230, 180, 0.65), 0 0 10px rgba(126, 230, 180, 0.45);
-    }}
-    .kpi-source {{
+    }
+    .kpi-source {
         margin-top: 6px;
         font-size: 11px;
-        color: {"#b6f5dc" if dark_mode else "#1f5d3a"};
-    }}
-    .rec-card {{
-        background: {card_bg};
-        border: 1px solid {panel_border};
+        color: var(--kpi-source-text);
+    }
+    .rec-card {
+        background: var(--card-bg);
+        border: 1px solid var(--panel-border);
         border-radius: 14px;
         padding: 14px 16px;
-        margin-bottom: 10px;
-        box-shadow: {"0 10px 20px rgba(0,0,0,0.35)" if dark_mode else "0 8px 16px rgba(15,23,42,0.12)"};
-        color: {text};
-    }}
-    .rec-card {{
+        box-shadow: var(--card-shadow);
+        color: var(--text);
+    }
+    .rec-card {
         font-size: 14px;
         line-height: 1.4;
-    }}
-    .rec-title {{
+    }
+    .rec-list {
+        display: flex;
+        flex-direction: column;
+        gap: 10px;
+    }
+    .rec-title {
         font-weight: 700;
         font-size: 17px;
         margin-bottom: 6px;
-        color: {text};
-    }}
-    .rec-meta {{
+        color: var(--text);
+    }
+    .rec-meta {
         display: inline-block;
         padding: 4px 10px;
         border-radius: 999px;
-        background: {panel};
-        border: 1px solid {panel_border};
-        color: {text};
+        background: var(--panel);
+        border: 1px solid var(--panel-border);
+        color: var(--text);
         font-size: 13px;
         margin-top: 8px;
-    }}
-    .rec-card * {{
-        color: {text} !important;
-    }}
-    .metric-card svg, .rec-card svg {{
+    }
+    .rec-card :where(div, span, p, ul, li, a, label, input, button, svg) {
+        color: var(--text) !important;
+    }
+    .metric-card svg, .rec-card svg {
         width: 22px;
         height: 22px;
-    }}
+    }
     .metric-card svg path, .metric-card svg circle,
-    .rec-card svg path, .rec-card svg circle {{
-        fill: {text} !important;
-        stroke: {text} !important;
-    }}
-    .icon-nav svg path {{
+    .rec-card svg path, .rec-card svg circle {
+        fill: var(--text) !important;
+        stroke: var(--text) !important;
+    }
+    .icon-nav svg path {
         fill: var(--icon-color) !important;
         stroke: var(--icon-color) !important;
-    }}
-    .icon-nav svg {{
+    }
+    .icon-nav svg {
         width: 20px;
         height: 20px;
-    }}
-    .svg-icon, .action-icon {{
+    }
+    .svg-icon {
         width: 20px;
         height: 20px;
-    }}
-    .brand-badge {{
+    }
+    .brand-badge {
         display: inline-flex;
         align-items: center;
         gap: 6px;
         padding: 4px 10px;
         border-radius: 8px;
         font-weight: 700;
-        color: {"#bff7d4" if dark_mode else "#0b3d1e"};
-        background: {"rgba(43, 214, 115, 0.18)" if dark_mode else "rgba(43, 214, 115, 0.22)"};
-        border: 1px solid {"rgba(43, 214, 115, 0.35)" if dark_mode else "rgba(43, 214, 115, 0.45)"};
-        box-shadow: {"0 0 10px rgba(126,230,180,0.35)" if dark_mode else "0 4px 10px rgba(15,23,42,0.12)"};
-    }}
+        color: var(--case-head-text);
+        background: var(--brand-badge-bg);
+        border: 1px solid var(--brand-badge-border);
+        box-shadow: var(--brand-badge-shadow);
+    }
     .stCheckbox label, .stCheckbox span,
     .stRadio label, .stRadio span,
     .stSelectbox label, .stSelectbox span,
-    .stTextInput label, .stNumberInput label, .stTextArea label {{
-        color: {text} !important;
-    }}
-    .svg-icon {{
+    .stTextInput label, .stNumberInput label, .stTextArea label {
+        color: var(--text) !important;
+    }
+    .svg-icon {
         vertical-align: middle;
         margin-right: 6px;
-    }}
-    .action-icon {{
+    }
+    .action-icon {
+        display: inline-block;
+        width: 22px;
+        height: 22px;
         vertical-align: middle;
         margin-right: 8px;
-    }}
-    .compact .stSidebar {{
-        width: 72px !important;
-    }}
-    .compact .stSidebar label, .compact .stSidebar span, .compact .stSidebar p {{
-        font-size: 10px;
-    }}
-    @media (max-width: 900px) {{
-        .topbar {{
+        background-color: currentColor;
+        -webkit-mask: var(--action-icon) center / contain no-repeat;
+        mask: var(--action-icon) center / contain no-repeat;
+    }
+    @media (max-width: 900px) {
+        .topbar {
             flex-direction: column;
             align-items: flex-start;
             gap: 8px;
-        }}
-        .nav {{
+        }
+        .nav {
             width: 100%;
             flex-wrap: wrap;
             justify-content: flex-start;
-        }}
-        .logo {{
+        }
+        .logo {
             font-size: 24px;
-        }}
-        .logo .title-emoji {{
+        }
+        .logo .title-emoji {
             font-size: 24px;
-        }}
-        .logo .title-strong {{
+        }
+        .logo .title-strong {
             font-size: 24px;
             padding: 4px 8px;
-        }}
-        .title-frame svg {{
+        }
+        .title-frame svg {
             width: 22px;
             height: 22px;
-        }}
-        .nav a {{
+        }
+        .nav a {
             font-size: 14px;
             padding: 6px 8px;
-        }}
-        [data-testid="stHorizontalBlock"] {{
+        }
+        [data-testid="stHorizontalBlock"] {
             flex-direction: column !important;
             gap: 12px !important;
-        }}
-        [data-testid="stColumn"] {{
+        }
+        [data-testid="stColumn"] {
             width: 100% !important;
             flex: 1 1 100% !important;
-        }}
-        .metric-card {{
+        }
+        .metric-row {
+            grid-template-columns: 1fr;
+            gap: 12px;
+        }
+        .metric-card {
             margin-bottom: 10px;
-        }}
-        .rec-card {{
-            margin-bottom: 12px;
-        }}
-        .block-container {{
+        }
+        .rec-list {
+            gap: 12px;
+        }
+        .block-container {
             padding-left: 1rem !important;
             padding-right: 1rem !important;
-        }}
-    }}
-    @media (max-width: 520px) {{
-        html {{
+        }
+    }
+    @media (max-width: 520px) {
+        html {
             font-size: 14px;
-        }}
-        body {{
+        }
+        body {
             -webkit-text-size-adjust: 100%;
-        }}
-        .topbar {{
+        }
+        .topbar {
             padding: 10px 12px;
-        }}
-        .logo {{
+        }
+        .logo {
             font-size: 20px;
             gap: 6px;
-        }}
-        .logo .title-emoji {{
+        }
+        .logo .title-emoji {
             font-size: 20px;
-        }}
-        .logo .title-strong {{
+        }
+        .logo .title-strong {
             font-size: 20px;
             padding: 4px 6px;
-        }}
-        .title-frame {{
+        }
+        .title-frame {
             padding: 4px 6px;
             gap: 6px;
-        }}
-        .title-frame svg {{
+        }
+        .title-frame svg {
             width: 20px;
             height: 20px;
-        }}
-        .nav {{
+        }
+        .nav {
             gap: 6px;
-        }}
-        .nav a {{
+        }
+        .nav a {
             font-size: 13px;
             padding: 5px 6px;
-        }}
-    }}
-    {".compact [data-testid='stSidebar'] { width: 72px !important; }" if compact_sidebar else ""}
+        }
+    }
+
     </style>
-    """,
-    unsafe_allow_html=True,
+"""
+
+
+def _build_theme_css(dark_mode: bool) -> str:
+    """:root custom properties for the active theme only."""
+    index = 0 if dark_mode else 1
+    props = "\n".join(f"        --{name}: {values[index]};" for name, values in _THEME_TOKENS.items())
+    return f"<style>\n    :root {{\n{props}\n    }}\n    </style>"
+
+
+# Sent only while compact mode is on, so toggling never touches the main stylesheet.
+_COMPACT_SIDEBAR_CSS = """
+    <style>
+    .stSidebar, [data-testid="stSidebar"] {
+        width: 72px !important;
+    }
+    .stSidebar label, .stSidebar span, .stSidebar p {
+        font-size: 10px;
+    }
+    </style>
+"""
+
+_METRIC_SVG_OPEN = (
+    "<svg class='svg-icon' width='14' height='14' viewBox='0 0 24 24' fill='none' "
+    "xmlns='http://www.w3.org/2000/svg'>"
+)
+_PUE_SVG = _METRIC_SVG_OPEN + "<path d='M13 2L3 14h7l-1 8 10-12h-7l1-8z' fill='#cfe0ff'/></svg>"
+_DCIE_SVG = (
+    _METRIC_SVG_OPEN + "<path d='M4 19h16v2H4z' fill='#cfe0ff'/>"
+    "<path d='M6 17V9h3v8H6zm5 0V5h3v12h-3zm5 0v-6h3v6h-3z' fill='#cfe0ff'/></svg>"
+)
+_CO2_SVG = (
+    _METRIC_SVG_OPEN + "<path d='M12 2C7 2 3 6 3 11c0 4 2.6 7.5 6.4 8.7'"
+    " stroke='#cfe0ff' stroke-width='2' fill='none'/>"
+    "<path d='M12 2c5 0 9 4 9 9 0 4-2.6 7.5-6.4 8.7' stroke='#cfe0ff' stroke-width='2' fill='none'/>"
+    "</svg>"
 )
+_APPLIED_BADGE = " <span class='kpi-applied'>Applied</span>"
+_METRIC_CARD_TPL = (
+    "<div class='metric-card'><h3>{svg}{label}{badge}</h3>"
+    "<div class='value'>{value}</div>{source}</div>"
+)
+_WORKLOAD_AUDIT_TPL = """
+    <div class='section'>
+    N = <b>{n_display}</b> inferences (total inferences in the scenario)<br>
+    GPU total time (h): <b>{gpu_time_h:.2f}</b><br>
+    Edge total time (h): <b>{edge_time_h:.2f}</b><br>
+    GPU total energy (kWh): <b>{gpu_energy_kwh:.3f}</b><br>
+    Edge total energy (kWh): <b>{edge_energy_kwh:.3f}</b><br>
+    GPU energy per inference (Wh): <b>{gpu_energy_per_inf_wh:.6f}</b><br>
+    Edge energy per inference (Wh): <b>{edge_energy_per_inf_wh:.6f}</b><br>
+    GPU cost (€): <b>{gpu_cost_display}</b><br>
+    Edge cost (€): <b>{edge_cost_display}</b>
+    <br><br><b>Decision:</b><br>{decision_html}<br><br>
+    <b>Business goal:</b><br>{goal_line}<br><br>
+    <b>Key indicators:</b><br>
+    <span class='badge badge-solid'>Fastest: {fastest}</span>
+    <span class='badge badge-solid'>Lowest energy: {lowest_energy}</span>
+    <span class='badge badge-solid'>Lowest cost: {lowest_cost}</span>
+    <br><br><b>Recommendation:</b><br>{rec_html}
+    </div>
+"""
+_REC_CARD_TPL = (
+    "<div class='rec-card'><div class='rec-title'>{icon}{title}</div>"
+    "<div class='subtle'>{reason}</div>"
+    "<div class='rec-meta'>Estimated Saving: {saving}%</div></div>"
+)
+
+# Icon shapes as standalone SVG masks. Each one is encoded once into a CSS class;
+# the cards only emit an empty <span>, painted with currentColor.
+_ACTION_ICON_SHAPES = {
+    "consolidation": "<path d='M4 4h16v6H4z'/><path d='M6 13h12v7H6z'/>",
+    "cooling": "<path d='M12 3v18M8 7h8M8 12h8M8 17h8' stroke='#000' stroke-width='2'/>",
+    "aisle": "<path d='M4 4h6v16H4z'/><path d='M14 4h6v16h-6z'/>",
+    "virtualization": (
+        "<rect x='4' y='4' width='7' height='7'/><rect x='13' y='4' width='7' height='7'/>"
+        "<rect x='4' y='13' width='7' height='7'/>"
+    ),
+    "default": "<circle cx='12' cy='12' r='8' fill='none' stroke='#000' stroke-width='2'/>",
+}
+
+
+def _icon_mask_url(shapes: str) -> str:
+    svg = f"<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 24 24'>{shapes}</svg>"
+    return "url(data:image/svg+xml;base64," + base64.b64encode(svg.encode("utf-8")).decode("ascii") + ")"
+
+
+_ACTION_ICON_CSS = (
+    "<style>\n"
+    + "".join(
+        f"    .action-icon--{name} {{ --action-icon: {_icon_mask_url(shapes)}; }}\n"
+        for name, shapes in _ACTION_ICON_SHAPES.items()
+    )
+    + "    </style>"
+)
+# Checked in order; the first keyword found in the action title picks the icon.
+_ACTION_ICONS = {
+    name: f"<span class='action-icon action-icon--{name}'></span>"
+    for name in _ACTION_ICON_SHAPES
+    if name != "default"
+}
+_DEFAULT_ACTION_ICON = "<span class='action-icon action-icon--default'></span>"
+
+
+def action_icon_html(action_title: str) -> str:
+    title = action_title.lower()
+    for keyword, icon in _ACTION_ICONS.items():
+        if keyword in title:
+            return icon
+    return _DEFAULT_ACTION_ICON
+
+
+def rec_card_html(rec: dict) -> str:
+    title = normalize_recommendation_text(rec["Action"])
+    return _REC_CARD_TPL.format(
+        icon=action_icon_html(title),
+        title=title,
+        reason=normalize_recommendation_text(rec["Why it helps"]),
+        saving=rec["Estimated Saving (%)"],
+    )
+
+
+_PAGES = frozenset({"landing", "dashboard", "about"})
+
+
+def _normalize_page(raw) -> str:
+    """Map the raw ?page= value to one of the known page names."""
+    if isinstance(raw, list):
+        raw = raw[0] if raw else ""
+    page_name = str(raw or "").lower()
+    return page_name if page_name in _PAGES else "landing"
+
+
+render_html(_BASE_CSS + _ACTION_ICON_CSS)
+render_html(_build_theme_css(dark_mode))
 st.markdown(
     """
     <script>
@@ -1804,88 +2282,54 @@ st.markdown(
 )
 
 if compact_sidebar:
-    st.markdown("<div class='compact'></div>", unsafe_allow_html=True)
+    render_html(_COMPACT_SIDEBAR_CSS)
 
 if hasattr(st, "query_params"):
     query = st.query_params
-    page_param = query.get("page", "landing")
-    if isinstance(page_param, list):
-        page_param = page_param[0]
+    page_param = _normalize_page(query.get("page", "landing"))
 else:
     query = st.experimental_get_query_params()
-    page_param = query.get("page", ["landing"])[0]
-page_param = page_param.lower()
-if page_param not in {"landing", "dashboard", "about"}:
-    page_param = "landing"
+    page_param = _normalize_page(query.get("page", ["landing"]))
 page = page_param.capitalize()
 
 
-def action_icon_svg(action_title: str) -> str:
-    title = action_title.lower()
-    if "consolidation" in title:
-        return (
-            "<svg class='action-icon' width='16' height='16' viewBox='0 0 24 24' fill='none' "
-            "xmlns='http://www.w3.org/2000/svg'><path d='M4 4h16v6H4z' fill='#cfe0ff'/>"
-            "<path d='M6 13h12v7H6z' fill='#9fb2ff'/></svg>"
-        )
-    if "cooling" in title:
-        return (
-            "<svg class='action-icon' width='16' height='16' viewBox='0 0 24 24' fill='none' "
-            "xmlns='http://www.w3.org/2000/svg'><path d='M12 3v18' stroke='#cfe0ff' stroke-width='2'/>"
-            "<path d='M8 7h8M8 12h8M8 17h8' stroke='#cfe0ff' stroke-width='2'/></svg>"
-        )
-    if "aisle" in title:
-        return (
-            "<svg class='action-icon' width='16' height='16' viewBox='0 0 24 24' fill='none' "
-            "xmlns='http://www.w3.org/2000/svg'><path d='M4 4h6v16H4z' fill='#cfe0ff'/>"
-            "<path d='M14 4h6v16h-6z' fill='#9fb2ff'/></svg>"
-        )
-    if "virtualization" in title:
-        return (
-            "<svg class='action-icon' width='16' height='16' viewBox='0 0 24 24' fill='none' "
-            "xmlns='http://www.w3.org/2000/svg'><rect x='4' y='4' width='7' height='7' fill='#cfe0ff'/>"
-            "<rect x='13' y='4' width='7' height='7' fill='#9fb2ff'/>"
-            "<rect x='4' y='13' width='7' height='7' fill='#9fb2ff'/></svg>"
-        )
-    return (
-        "<svg class='action-icon' width='16' height='16' viewBox='0 0 24 24' fill='none' "
-        "xmlns='http://www.w3.org/2000/svg'><circle cx='12' cy='12' r='8' stroke='#cfe0ff' stroke-width='2'/></svg>"
-    )
+# Plain substring scans: str `in` is a C fastsearch per keyword, which beat a
+# compiled alternation regex on long pasted text.
+_AUDIT_KEYWORDS = (
+    "pue",
+    "dcie",
+    "co2",
+    "carbon",
+    "energy",
+    "audit",
+    "data center",
+    "cooling",
+    "virtualization",
+    "consolidation",
+    "server",
+    "efficiency",
+    "recommendation",
+    "simulation",
+    "reduce",
+    "optimize",
+)
+_DEFINITION_CUES = ("what is", "define", "definition", "explain")
+_DOCUMENT_KEYWORDS = ("pdf", "document", "doc", "chapter", "summary", "extracted")
 
 
-def is_audit_question(question: str) -> bool:
-    q = question.lower()
-    keywords = [
-        "pue",
-        "dcie",
-        "co2",
-        "carbon",
-        "energy",
-        "audit",
-        "data center",
-        "cooling",
-        "virtualization",
-        "consolidation",
-        "server",
-        "efficiency",
-        "recommendation",
-        "simulation",
-        "reduce",
-        "optimize",
-    ]
-    return any(k in q for k in keywords)
+# The predicates take the already-lowercased question so callers lower it once.
+def is_audit_question(q_lower: str) -> bool:
+    return any(k in q_lower for k in _AUDIT_KEYWORDS)
 
 
-def is_definition_question(question: str) -> bool:
-    q = question.lower()
-    return any(k in q for k in ["what is", "define", "definition", "explain"]) and (
-        "green it" in q or "sustainable energy" in q
+def is_definition_question(q_lower: str) -> bool:
+    return ("green it" in q_lower or "sustainable energy" in q_lower) and any(
+        k in q_lower for k in _DEFINITION_CUES
     )
 
 
-def is_document_question(question: str) -> bool:
-    q = question.lower()
-    return any(k in q for k in ["pdf", "document", "doc", "chapter", "summary", "extracted"])
+def is_document_question(q_lower: str) -> bool:
+    return any(k in q_lower for k in _DOCUMENT_KEYWORDS)
 
 
 def is_long_paste(question: str) -> bool:
@@ -1895,32 +2339,17 @@ def is_long_paste(question: str) -> bool:
 def ai_assistant_reply(question: str, context: dict) -> str:
     if not question.strip():
         return "Please enter a question related to Green IT audits or data center optimization."
-    if is_definition_question(question):
-        excerpt = find_local_excerpt(question, st.session_state.get("local_doc_texts", []))
-        if excerpt:
-            return (
-                "Based on course materials:\n"
-                + excerpt
-                + "\n\nGreen IT reduces the environmental impact of digital systems across "
-                "their lifecycle, while sustainable energy focuses on low‑emission energy sources "
-                "and efficient consumption."
-            )
-        return (
-            "Green IT focuses on reducing the environmental impact of digital systems across "
-            "their entire lifecycle (design, use, and end-of-life) through sobriety, efficiency, "
-            "and measurable KPIs. Sustainable energy refers to energy produced and used in ways "
-            "that minimize emissions and preserve resources for the long term (renewables, "
-            "efficient consumption, and responsible sourcing)."
-        )
-    docs = context.get("doc_summaries", [])
-    if is_document_question(question) or is_long_paste(question):
+    q_lower = question.lower()
+    # Long pastes go straight to the document branch; the definition branch
+    # would otherwise scan every local course excerpt first.
+    if is_long_paste(question) or is_document_question(q_lower):
         extracted = extract_metrics_from_text(question)
         workload_inputs = extract_workload_inputs(question)
         if extracted.get("it_energy_mwh") and extracted.get("total_energy_mwh"):
             it_energy = extracted["it_energy_mwh"]
             total_energy = extracted["total_energy_mwh"]
             carbon_factor = extracted.get("carbon_factor", context["carbon_factor"])
-            pue = total_energy / it_energy if it_energy else context["pue"]
+            pue = cached_pue(it_energy, total_energy) if it_energy else context["pue"]
             dcie = (it_energy / total_energy) * 100 if total_energy else context["dcie"]
             co2 = calculate_co2_tonnes(total_energy, carbon_factor)
             intro = (
@@ -1932,7 +2361,28 @@ def ai_assistant_reply(question: str, context: dict) -> str:
         if any(workload_inputs.get(k) is not None for k in ["n_inferences", "gpu_power_w", "edge_power_w", "gpu_latency_ms", "edge_latency_ms"]):
             return "Use the Document QA block below to analyze AI workload benchmarks."
         return "Use the Document QA block below to analyze uploaded documents."
-    if not is_audit_question(question) and not context.get("doc_metrics"):
+    if is_definition_question(q_lower):
+        excerpt = find_local_excerpt(
+            question,
+            st.session_state.get("local_doc_texts", []),
+            st.session_state.get("local_doc_texts_lower"),
+        )
+        if excerpt:
+            return (
+                "Based on course materials:\n"
+                + excerpt
+                + "\n\nGreen IT reduces the environmental impact of digital systems across "
+                "their lifecycle, while sustainable energy focuses on low‑emission energy sources "
+                "and efficient consumption."
+            )
+        return (
+            "Green IT focuses on reducing the environmental impact of digital systems across "
+            "their entire lifecycle (design, use, and end-of-life) through sobriety, efficiency, "
+            "and measurable KPIs. Sustainable energy refers to energy produced and used in ways "
+            "that minimize emissions and preserve resources for the long term (renewables, "
+            "efficient consumption, and responsible sourcing)."
+        )
+    if not is_audit_question(q_lower) and not context.get("doc_metrics"):
         return (
             "I can only answer questions related to Green IT audits, data center energy, "
             "and optimization within this platform."
@@ -1948,8 +2398,6 @@ def ai_assistant_reply(question: str, context: dict) -> str:
     cooling = context["cooling_setpoint"]
     aisle = context["aisle_containment"]
     virt = context["virtualization_level"]
-    recs = context["recommendations"]
-    docs = context.get("doc_summaries", [])
 
     intro = (
         f"Based on your audit inputs: PUE {pue:.2f}, DCiE {dcie:.1f}%, CO2 {co2:.1f} t/y, "
@@ -1975,6 +2423,8 @@ def ai_assistant_reply(question: str, context: dict) -> str:
     return f"{intro}\n\n{plan}\n\n{note}"
 
 
+# Shared read-only across reruns and sessions; the TTL picks up edits to rules.json.
+@st.cache_resource(show_spinner=False, ttl=300)
 def load_rules() -> dict:
     rules_path = os.path.join(PROJECT_ROOT, "knowledge_base", "rules.json")
     try:
@@ -1984,18 +2434,18 @@ def load_rules() -> dict:
         return {"rules": [], "standards": []}
 
 
+# Trigger condition for each knowledge-base rule id.
+_RULE_TRIGGERS = (
+    ("CPU_LOW", lambda context: context["cpu_utilization"] < 20),
+    ("COOLING_HIGH", lambda context: context["cooling_ratio"] > 60),
+    ("PUE_HIGH", lambda context: context["pue"] > 1.6),
+)
+
+
 def rule_based_plan(context: dict, rules: dict) -> str:
-    cpu = context["cpu_utilization"]
-    cooling_ratio = context["cooling_ratio"]
-    pue = context["pue"]
-    applied = []
-    for rule in rules.get("rules", []):
-        if rule["id"] == "CPU_LOW" and cpu < 20:
-            applied.append(rule)
-        if rule["id"] == "COOLING_HIGH" and cooling_ratio > 60:
-            applied.append(rule)
-        if rule["id"] == "PUE_HIGH" and pue > 1.6:
-            applied.append(rule)
+    triggered = {rule_id for rule_id, check in _RULE_TRIGGERS if check(context)}
+    # Rules keep their order from rules.json.
+    applied = [rule for rule in rules.get("rules", []) if rule["id"] in triggered] if triggered else []
     if not applied:
         return "No rule triggered. Keep monitoring and maintain current best practices."
     lines = []
@@ -2006,11 +2456,185 @@ def rule_based_plan(context: dict, rules: dict) -> str:
     return "Rule-based actions:\n" + "\n".join(lines)
 
 
- 
+# Widget changes elsewhere on the page (assistant, document QA) rerun the whole
+# script; for unchanged audit inputs the recommendation and simulation results
+# come back from the cache instead of being recomputed.
+@st.cache_data(show_spinner=False, ttl=3600)
+def recommendation_rows(
+    it_energy_mwh: float,
+    total_energy_mwh: float,
+    carbon_factor: float,
+    ui_inputs_items: tuple,
+) -> list[dict]:
+    ui_inputs = dict(ui_inputs_items)
+    it_power_kw = (it_energy_mwh * 1000.0) / 8760.0 if it_energy_mwh else 0.0
+    metrics_dict = calculate_all_metrics(
+        it_power_kw=it_power_kw,
+        total_energy_mwh=total_energy_mwh,
+        carbon_factor_kg_per_kwh=carbon_factor,
+        it_energy_mwh=it_energy_mwh,
+    )
+    engine = RecommendationEngine(verbose=False)
+    try:
+        context = AuditContext.from_metrics_and_ui(metrics_dict, ui_inputs)
+        result = engine.generate_recommendations(context)
+        recommendations = result.recommendations
+    except Exception:
+        recommendations = legacy_build_recommendations(
+            cpu_utilization_pct=ui_inputs["cpu_utilization_pct"],
+            cooling_setpoint_c=ui_inputs["cooling_setpoint_c"],
+            has_aisle_containment=ui_inputs["has_aisle_containment"],
+            virtualization_level_pct=ui_inputs["virtualization_level_pct"],
+        )
+    recs_data = []
+    for rec in recommendations:
+        if hasattr(rec, "logic_explanation"):
+            reason = rec.logic_explanation or rec.description
+        else:
+            reason = rec.reason
+        recs_data.append(
+            {
+                "Action": rec.title,
+                "Why it helps": reason,
+                "Estimated Saving (%)": rec.estimated_saving_pct,
+            }
+        )
+    return recs_data
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def simulation_results(baseline_items: tuple, action_params_items: tuple) -> dict:
+    return get_simulation_results(
+        input_data=dict(baseline_items), action_params=dict(action_params_items)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def bar_chart_spec(category: str, value: str, labels: tuple, values: tuple) -> dict:
+    """Vega-Lite dict for a small bar chart; Altair compiles it once per data set."""
+    import altair as alt
+
+    # Inline records: a DataFrame is not worth building for a handful of bars.
+    source = alt.Data(values=[{category: label, value: amount} for label, amount in zip(labels, values)])
+    return (
+        alt.Chart(source)
+        .mark_bar()
+        .encode(
+            x=alt.X(field=category, type="nominal", title=category),
+            y=alt.Y(field=value, type="quantitative", title=value),
+            tooltip=[alt.Tooltip(field=category, type="nominal"), alt.Tooltip(field=value, type="quantitative")],
+        )
+        .to_dict()
+    )
+
+
+# Reruns triggered inside these panels (form submit, "Analyze Documents") only
+# re-execute the panel, not the KPIs, charts and simulation above it.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+
+@_fragment
+def assistant_panel(context: dict, simulate_web: bool) -> None:
+    render_html('<div id="assistant" class="section-title">GreenDC Audit AI</div><div class="soft-divider"></div>')
+    with st.form("assistant_form", clear_on_submit=False):
+        question = st.text_area(
+            "Ask a question about your audit (e.g., how to reach -25% CO2?)",
+            height=90,
+            key="assistant_question",
+        )
+        submitted = st.form_submit_button("Ask Knowledge Assistant")
+    # Re-submitting the same question against the same audit keeps the last reply.
+    reply_key = (question, simulate_web, json.dumps(context, sort_keys=True, default=str)) if submitted else None
+    if submitted and st.session_state.get("assistant_reply_key") != reply_key:
+        rules = load_rules()
+        reply = ai_assistant_reply(question, context)
+        q_lower = question.lower()
+        is_doc_query = is_long_paste(question) or is_document_question(q_lower)
+        if (is_audit_question(q_lower) or context.get("doc_metrics")) and not is_doc_query:
+            rules_block = rule_based_plan(context, rules)
+            reply += "\n\n" + rules_block
+        docs_used = "YES" if context.get("doc_summaries") else "NO"
+        reply += f"\n\nDocs used: {docs_used}"
+        if simulate_web and not is_doc_query:
+            reply += "\n\nSimulated web search: This is a mock summary based on best practices."
+        st.session_state.assistant_reply = reply
+        st.session_state.assistant_reply_key = reply_key
+    if "assistant_reply" in st.session_state:
+        st.markdown(f"<div class='section'>{st.session_state.assistant_reply}</div>", unsafe_allow_html=True)
+    st.caption("Offline assistant. Uses rules + local/HF knowledge only (no web scraping).")
+
+
+@_fragment
+def doc_qa_panel(business_goal: str) -> None:
+    doc_question = st.text_area(
+        "Ask a question about uploaded documents (e.g., extract latency or cost KPIs).",
+        height=90,
+        key="doc_question",
+    )
+    if st.button("Analyze Documents"):
+        docs = st.session_state.get("doc_texts", [])
+        combined = joined_doc_texts()[0] + "\n" + doc_question
+        if not docs and not doc_question.strip():
+            st.session_state["doc_reply"] = "No document uploaded yet."
+        else:
+            combined_hash = text_digest(combined)
+            inputs, results = workload_audit_from_text(combined, combined_hash)
+            if "error" in results:
+                if any(inputs.get(k) is not None for k in ["n_inferences", "gpu_power_w", "edge_power_w", "gpu_latency_ms", "edge_latency_ms"]):
+                    st.session_state["doc_reply"] = (
+                        "Document KPIs detected but incomplete. "
+                        + results["error"]
+                        + "\nExtracted values: "
+                        + ", ".join(f"{k}={v}" for k, v in inputs.items())
+                    )
+                else:
+                    st.session_state["doc_reply"] = (
+                        "This document is a Green IT audit scenario (not an AI workload benchmark). "
+                        "Use the main KPIs and Applied parameters above."
+                    )
+            else:
+                gpu_cost_line = (
+                    f"GPU cost (€): {results['gpu_cost']:.2f}"
+                    if results["gpu_cost"] is not None
+                    else "GPU cost (€): n/a"
+                )
+                edge_cost_line = (
+                    f"Edge cost (€): {results['edge_cost']:.2f}"
+                    if results["edge_cost"] is not None
+                    else "Edge cost (€): n/a"
+                )
+                decision_html, rec_html = workload_report_html(combined, combined_hash)
+                goal_line = business_goal_recommendation(business_goal, results)
+                n_value = inputs.get("n_inferences")
+                n_display = f"{int(n_value):,}" if n_value else "n/a"
+                st.session_state["doc_reply"] = (
+                    "<div class='section'>"
+                    "<b>AI Workload Audit (from documents)</b><br>"
+                    f"N = <b>{n_display}</b> inferences (total inferences in the scenario)<br>"
+                    f"GPU total time (h): <b>{results['gpu_time_h']:.2f}</b><br>"
+                    f"Edge total time (h): <b>{results['edge_time_h']:.2f}</b><br>"
+                    f"GPU total energy (kWh): <b>{results['gpu_energy_kwh']:.3f}</b><br>"
+                    f"Edge total energy (kWh): <b>{results['edge_energy_kwh']:.3f}</b><br>"
+                    f"GPU energy per inference (Wh): <b>{results['gpu_energy_per_inf_wh']:.6f}</b><br>"
+                    f"Edge energy per inference (Wh): <b>{results['edge_energy_per_inf_wh']:.6f}</b><br>"
+                    f"{gpu_cost_line}<br>"
+                    f"{edge_cost_line}"
+                    "<div class='soft-divider'></div>"
+                    "<b>Decision</b><br>"
+                    f"{decision_html}"
+                    "<div class='soft-divider'></div>"
+                    f"<b>Business goal</b><br>{goal_line}"
+                    "<div class='soft-divider'></div>"
+                    "<b>Recommendation</b><br>"
+                    f"{rec_html}"
+                    "</div>"
+                )
+    if st.session_state.get("doc_reply"):
+        st.markdown(st.session_state["doc_reply"], unsafe_allow_html=True)
 
 
 if page == "Landing":
-    st.markdown(
+    render_html(
         """
         <div class="hero">
             <h1>🌿⚡ GreenDC Audit Platform</h1>
@@ -2023,24 +2647,17 @@ if page == "Landing":
             </div>
             <div class="brand-badge" style="margin-top: 10px;">🍃 GreenAI Systems</div>
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
     )
     left, right = st.columns([1.2, 1])
     with left:
-        st.markdown("<div class='section-title'>Why GreenDC?</div>", unsafe_allow_html=True)
-        st.markdown(
+        render_html(
             """
+            <div class="section-title">Why GreenDC?</div>
             <div class="section">
                 A practical platform to measure, explain, and validate energy and carbon reductions.
                 Built for industrial data centers with realistic constraints.
             </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        st.markdown("")
-        st.markdown(
-            """
             <div class="section">
                 <b>Core pillars:</b>
                 <ul>
@@ -2049,13 +2666,12 @@ if page == "Landing":
                     <li>Scenario validation to reach -25%</li>
                 </ul>
             </div>
-            """,
-            unsafe_allow_html=True,
+            """
         )
     with right:
-        st.markdown("<div class='section-title'>Platform Snapshot</div>", unsafe_allow_html=True)
-        st.markdown(
+        render_html(
             """
+            <div class="section-title">Platform Snapshot</div>
             <div class="section">
                 <b>Inputs:</b> Energy, cooling, utilization, carbon factor<br><br>
                 <b>Outputs:</b> KPIs, AI recommendations, savings simulation<br><br>
@@ -2063,12 +2679,14 @@ if page == "Landing":
                 <span class="badge badge-solid">Explainable</span>
                 <span class="badge badge-solid">Lightweight</span>
             </div>
-            """,
-            unsafe_allow_html=True,
+            """
         )
 
 if page == "Dashboard":
-    st.markdown(
+    import altair as alt
+    import pandas as pd
+
+    render_html(
         f"""
         <div class="topbar">
             <div class="logo">
@@ -2118,16 +2736,13 @@ if page == "Dashboard":
                 </div>
             </div>
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
     )
-    st.markdown("<div id='metrics' class='section-title'>Key Metrics</div>", unsafe_allow_html=True)
+    render_html("<div id='metrics' class='section-title'>Key Metrics</div>")
     metrics_col, recs_col = st.columns([1, 1])
 
     with metrics_col:
-        pue = calculate_pue(it_energy_mwh, total_energy_mwh)
-        dcie = calculate_dcie(it_energy_mwh, total_energy_mwh)
-        co2_tonnes = calculate_co2_tonnes(total_energy_mwh, carbon_factor)
+        pue, dcie, co2_tonnes = calculate_energy_metrics(it_energy_mwh, total_energy_mwh, carbon_factor)
         if doc_metrics:
             if "pue" in doc_metrics:
                 pue = doc_metrics["pue"]
@@ -2151,40 +2766,29 @@ if page == "Dashboard":
         dcie_from_doc = ("dcie" in doc_metrics) or ("pue" in doc_metrics) or ("dcie" in case_defaults) or ("pue" in case_defaults)
         co2_from_doc = ("co2_tonnes" in doc_metrics) or ("total_energy_mwh" in doc_metrics) or ("carbon_factor" in doc_metrics) or ("co2_tonnes" in case_defaults) or ("total_energy_mwh" in case_defaults) or ("carbon_factor" in case_defaults)
 
-        metric_cols = st.columns(3)
-        with metric_cols[0]:
-            pue_badge = " <span class='kpi-applied'>Applied</span>" if pue_from_doc else ""
-            pue_source = f"<div class='kpi-source'>Source: {source_label}</div>" if pue_from_doc and source_label else ""
-            st.markdown(
-                f"<div class='metric-card'><h3>"
-                f"<svg class='svg-icon' width='14' height='14' viewBox='0 0 24 24' fill='none' "
-                f"xmlns='http://www.w3.org/2000/svg'><path d='M13 2L3 14h7l-1 8 10-12h-7l1-8z' "
-                f"fill='#cfe0ff'/></svg>PUE{pue_badge}</h3><div class='value'>{pue:.2f}</div>{pue_source}</div>",
-                unsafe_allow_html=True,
-            )
-        with metric_cols[1]:
-            dcie_badge = " <span class='kpi-applied'>Applied</span>" if dcie_from_doc else ""
-            dcie_source = f"<div class='kpi-source'>Source: {source_label}</div>" if dcie_from_doc and source_label else ""
-            st.markdown(
-                f"<div class='metric-card'><h3>"
-                f"<svg class='svg-icon' width='14' height='14' viewBox='0 0 24 24' fill='none' "
-                f"xmlns='http://www.w3.org/2000/svg'><path d='M4 19h16v2H4z' fill='#cfe0ff'/>"
-                f"<path d='M6 17V9h3v8H6zm5 0V5h3v12h-3zm5 0v-6h3v6h-3z' fill='#cfe0ff'/></svg>"
-                f"DCiE{dcie_badge}</h3><div class='value'>{dcie:.1f}%</div>{dcie_source}</div>",
-                unsafe_allow_html=True,
-            )
-        with metric_cols[2]:
-            co2_badge = " <span class='kpi-applied'>Applied</span>" if co2_from_doc else ""
-            co2_source = f"<div class='kpi-source'>Source: {source_label}</div>" if co2_from_doc and source_label else ""
-            st.markdown(
-                f"<div class='metric-card'><h3>"
-                f"<svg class='svg-icon' width='14' height='14' viewBox='0 0 24 24' fill='none' "
-                f"xmlns='http://www.w3.org/2000/svg'><path d='M12 2C7 2 3 6 3 11c0 4 2.6 7.5 6.4 8.7'"
-                f" stroke='#cfe0ff' stroke-width='2' fill='none'/>"
-                f"<path d='M12 2c5 0 9 4 9 9 0 4-2.6 7.5-6.4 8.7' stroke='#cfe0ff' stroke-width='2' fill='none'/>"
-                f"</svg>CO2{co2_badge}</h3><div class='value'>{co2_tonnes:.1f} t/y</div>{co2_source}</div>",
-                unsafe_allow_html=True,
+        metric_cards = (
+            (_PUE_SVG, "PUE", f"{pue:.2f}", pue_from_doc),
+            (_DCIE_SVG, "DCiE", f"{dcie:.1f}%", dcie_from_doc),
+            (_CO2_SVG, "CO2", f"{co2_tonnes:.1f} t/y", co2_from_doc),
+        )
+        # One element for the whole KPI row; .metric-row lays the cards out.
+        st.markdown(
+            "<div class='metric-row'>"
+            + "".join(
+                _METRIC_CARD_TPL.format(
+                    svg=svg,
+                    label=label,
+                    badge=_APPLIED_BADGE if applied else "",
+                    value=value,
+                    source=f"<div class='kpi-source'>Source: {source_label}</div>"
+                    if applied and source_label
+                    else "",
+                )
+                for svg, label, value, applied in metric_cards
             )
+            + "</div>",
+            unsafe_allow_html=True,
+        )
 
         st.markdown(
             f"<div class='section'>Servers: <b>{servers}</b> | CPU Utilization: <b>{cpu_utilization:.1f}%</b>"
@@ -2203,10 +2807,11 @@ if page == "Dashboard":
                 unsafe_allow_html=True,
             )
             if "applied_params" in locals() and applied_params:
-                st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
-                st.markdown("<div class='subtle'><b>Applied parameters</b></div>", unsafe_allow_html=True)
-                for item in applied_params[:6]:
-                    st.markdown(f"<div class='subtle'>• {item}</div>", unsafe_allow_html=True)
+                st.markdown(
+                    "<div class='soft-divider'></div><div class='subtle'><b>Applied parameters</b></div>"
+                    + "".join(f"<div class='subtle'>• {item}</div>" for item in applied_params[:6]),
+                    unsafe_allow_html=True,
+                )
             course_baseline = {
                 "it_energy_mwh": 780.0,
                 "total_energy_mwh": 1300.0,
@@ -2250,22 +2855,22 @@ if page == "Dashboard":
                         }
                     )
             if comparison_rows:
-                st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
+                render_html("<div class='soft-divider'></div>")
                 render_table(pd.DataFrame(comparison_rows), "Real case study vs Course/Exercises (test)")
             if use_real_case:
                 csv_data, csv_records = load_case_study_csv()
                 if csv_records:
-                    st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
+                    render_html("<div class='soft-divider'></div>")
                     render_table(pd.DataFrame(csv_records), "Case study dataset (CSV)")
             td_rows = load_td_validation()
             if td_rows:
-                st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
+                render_html("<div class='soft-divider'></div>")
                 render_table(pd.DataFrame(td_rows), "TD Validation (course exercises)")
             if use_real_case:
                 case_json = load_case_study_json()
                 if case_json:
-                    st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
-                    st.markdown("<div class='section-title'>Google Case Study Insights</div>", unsafe_allow_html=True)
+                    render_html("<div class='soft-divider'></div>")
+                    render_html("<div class='section-title'>Google Case Study Insights</div>")
                     metrics_df = pd.DataFrame(
                         [
                             {"Metric": "IT Energy (MWh/year)", "Value": it_energy_mwh},
@@ -2372,14 +2977,7 @@ if page == "Dashboard":
         )
 
     with recs_col:
-        st.markdown("<div id='recommendations' class='section-title'>AI Recommendations</div>", unsafe_allow_html=True)
-        it_power_kw = (it_energy_mwh * 1000.0) / 8760.0 if it_energy_mwh else 0.0
-        metrics_dict = calculate_all_metrics(
-            it_power_kw=it_power_kw,
-            total_energy_mwh=total_energy_mwh,
-            carbon_factor_kg_per_kwh=carbon_factor,
-            it_energy_mwh=it_energy_mwh,
-        )
+        render_html("<div id='recommendations' class='section-title'>AI Recommendations</div>")
         ui_inputs = {
             "servers": servers,
             "cpu_utilization_pct": cpu_utilization,
@@ -2387,46 +2985,16 @@ if page == "Dashboard":
             "has_aisle_containment": aisle_containment,
             "virtualization_level_pct": virtualization_level,
             "cooling_type": case_study_defaults.get("cooling_type", "air"),
-            "use_ml_ranking": st.session_state.get("use_ml_ranking", False),
+            "use_ml_ranking": use_ml_ranking,
         }
-        engine = RecommendationEngine(verbose=False)
-        try:
-            context = AuditContext.from_metrics_and_ui(metrics_dict, ui_inputs)
-            result = engine.generate_recommendations(context)
-            recommendations = result.recommendations
-        except Exception:
-            recommendations = legacy_build_recommendations(
-                cpu_utilization_pct=cpu_utilization,
-                cooling_setpoint_c=cooling_setpoint,
-                has_aisle_containment=aisle_containment,
-                virtualization_level_pct=virtualization_level,
-            )
-        recs_data = []
-        for rec in recommendations:
-            if hasattr(rec, "logic_explanation"):
-                reason = rec.logic_explanation or rec.description
-                estimated = rec.estimated_saving_pct
-                title = rec.title
-            else:
-                reason = rec.reason
-                estimated = rec.estimated_saving_pct
-                title = rec.title
-            recs_data.append(
-                {
-                    "Action": title,
-                    "Why it helps": reason,
-                    "Estimated Saving (%)": estimated,
-                }
-            )
-        for rec in recs_data:
-            action_text = normalize_recommendation_text(rec["Action"])
-            reason_text = normalize_recommendation_text(rec["Why it helps"])
+        it_power_kw = (it_energy_mwh * 1000.0) / 8760.0 if it_energy_mwh else 0.0
+        recs_data = recommendation_rows(
+            it_energy_mwh, total_energy_mwh, carbon_factor, tuple(ui_inputs.items())
+        )
+        if recs_data:
+            # One element for the whole list; .rec-list spaces the cards.
             st.markdown(
-                f"<div class='rec-card'>"
-                f"<div class='rec-title'>{action_icon_svg(action_text)}{action_text}</div>"
-                f"<div class='subtle'>{reason_text}</div>"
-                f"<div class='rec-meta'>Estimated Saving: {rec['Estimated Saving (%)']}%</div>"
-                f"</div>",
+                "<div class='rec-list'>" + "".join(map(rec_card_html, recs_data)) + "</div>",
                 unsafe_allow_html=True,
             )
         show_more = st.checkbox("Show additional suggestions (informational)", value=False)
@@ -2452,26 +3020,27 @@ if page == "Dashboard":
                     f"Procure renewable energy (not triggered: carbon factor {carbon_factor:.3f} ≤ 0.2)"
                 )
             if info:
-                st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
-                st.markdown("<div class='subtle'><b>Additional suggestions (not triggered)</b></div>", unsafe_allow_html=True)
-                for item in info:
-                    st.markdown(f"<div class='subtle'>• {item}</div>", unsafe_allow_html=True)
-        st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
-        st.markdown("<div class='subtle'><b>Best practices (always applicable)</b></div>", unsafe_allow_html=True)
-        best_practices = [
-            "Keep continuous monitoring of PUE/DCiE and cooling performance.",
-            "Review workload placement to avoid idle capacity and hotspots.",
-            "Maintain containment integrity and airflow management.",
-            "Track energy mix improvements and document carbon reductions.",
-        ]
-        for item in best_practices:
-            st.markdown(f"<div class='subtle'>• {item}</div>", unsafe_allow_html=True)
-
-    st.markdown("<div id='simulation' class='section-title'>Before / After Simulation</div>", unsafe_allow_html=True)
+                st.markdown(
+                    "<div class='soft-divider'></div><div class='subtle'><b>Additional suggestions (not triggered)</b></div>"
+                    + "".join(f"<div class='subtle'>• {item}</div>" for item in info),
+                    unsafe_allow_html=True,
+                )
+        render_html(
+            """
+            <div class='soft-divider'></div>
+            <div class='subtle'><b>Best practices (always applicable)</b></div>
+            <div class='subtle'>• Keep continuous monitoring of PUE/DCiE and cooling performance.</div>
+            <div class='subtle'>• Review workload placement to avoid idle capacity and hotspots.</div>
+            <div class='subtle'>• Maintain containment integrity and airflow management.</div>
+            <div class='subtle'>• Track energy mix improvements and document carbon reductions.</div>
+            """
+        )
+
+    render_html("<div id='simulation' class='section-title'>Before / After Simulation</div>")
     action_params = {}
-    for rec in recommendations:
-        title = rec.title.lower() if hasattr(rec, "title") and rec.title else ""
-        saving = rec.estimated_saving_pct if hasattr(rec, "estimated_saving_pct") else None
+    for rec in recs_data:
+        title = rec["Action"].lower() if rec["Action"] else ""
+        saving = rec["Estimated Saving (%)"]
         if saving is None:
             continue
         if "consolidation" in title:
@@ -2491,69 +3060,63 @@ if page == "Dashboard":
         "dcie_percent": dcie,
         "co2_tonnes_per_year": co2_tonnes,
     }
-    simulation = get_simulation_results(input_data=baseline_data, action_params=action_params)
+    simulation = simulation_results(tuple(baseline_data.items()), tuple(action_params.items()))
     baseline = simulation["baseline"]
     single_actions = simulation["single_actions"]
     combined = simulation["combined"]
 
-    comparison_df = pd.DataFrame([
-        {
-            "Metric": "Total Energy (MWh/year)",
-            "Baseline": baseline["total_energy_mwh"],
-            "Optimized": combined["optimized_energy_mwh"],
-        },
+    comparison_df = pd.DataFrame(
         {
-            "Metric": "CO2 Emissions (t/year)",
-            "Baseline": baseline["co2_tonnes_per_year"],
-            "Optimized": combined["optimized_co2_tonnes"],
-        },
-        {
-            "Metric": "Energy Saved (MWh/year)",
-            "Baseline": 0,
-            "Optimized": combined["energy_saved_mwh"],
-        },
-        {
-            "Metric": "CO2 Saved (t/year)",
-            "Baseline": 0,
-            "Optimized": combined["co2_saved_tonnes"],
-        },
-        {
-            "Metric": "Reduction (%)",
-            "Baseline": 0,
-            "Optimized": combined["reduction_percent"],
-        },
-    ])
+            "Metric": [
+                "Total Energy (MWh/year)",
+                "CO2 Emissions (t/year)",
+                "Energy Saved (MWh/year)",
+                "CO2 Saved (t/year)",
+                "Reduction (%)",
+            ],
+            "Baseline": [baseline["total_energy_mwh"], baseline["co2_tonnes_per_year"], 0, 0, 0],
+            "Optimized": [
+                combined["optimized_energy_mwh"],
+                combined["optimized_co2_tonnes"],
+                combined["energy_saved_mwh"],
+                combined["co2_saved_tonnes"],
+                combined["reduction_percent"],
+            ],
+        }
+    )
 
     st.subheader("Baseline vs Optimized Comparison")
     st.dataframe(comparison_df, use_container_width=True)
 
-    actions_df = pd.DataFrame([
+    action_names = [a["action_name"] for a in single_actions]
+    action_energy_saved = [a["energy_saved_mwh"] for a in single_actions]
+    actions_df = pd.DataFrame(
         {
-            "Action": a["action_name"],
-            "Energy Saved (MWh/year)": a["energy_saved_mwh"],
-            "CO2 Saved (t/year)": a["co2_saved_tonnes"],
+            "Action": action_names,
+            "Energy Saved (MWh/year)": action_energy_saved,
+            "CO2 Saved (t/year)": [a["co2_saved_tonnes"] for a in single_actions],
         }
-        for a in single_actions
-    ])
+    )
 
     st.subheader("Savings by Action")
     st.dataframe(actions_df, use_container_width=True)
 
-    energy_chart_df = pd.DataFrame([
-        {"Scenario": "Baseline", "Energy (MWh/year)": baseline["total_energy_mwh"]},
-        {"Scenario": "Optimized", "Energy (MWh/year)": combined["optimized_energy_mwh"]},
-    ])
-
     st.subheader("Baseline vs Optimized Energy")
-    st.bar_chart(energy_chart_df.set_index("Scenario"))
-
-    action_chart_df = pd.DataFrame([
-        {"Action": a["action_name"], "Energy Saved (MWh/year)": a["energy_saved_mwh"]}
-        for a in single_actions
-    ])
+    st.vega_lite_chart(
+        bar_chart_spec(
+            "Scenario",
+            "Energy (MWh/year)",
+            ("Baseline", "Optimized"),
+            (baseline["total_energy_mwh"], combined["optimized_energy_mwh"]),
+        ),
+        use_container_width=True,
+    )
 
     st.subheader("Energy Saved per Action")
-    st.bar_chart(action_chart_df.set_index("Action"))
+    st.vega_lite_chart(
+        bar_chart_spec("Action", "Energy Saved (MWh/year)", tuple(action_names), tuple(action_energy_saved)),
+        use_container_width=True,
+    )
 
     st.subheader("Target Validation")
     st.markdown(
@@ -2567,11 +3130,10 @@ if page == "Dashboard":
         st.success("Target -25% CO2 is achieved.")
     else:
         st.warning("Target -25% CO2 is not achieved.")
-    st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
-    st.markdown("<div class='section-title'>Energy Validation (Assumptions)</div>", unsafe_allow_html=True)
-    st.markdown(
-        "<div class='subtle'>Ranges validated by the Energy & Sustainability expert to keep the -25% trajectory realistic.</div>",
-        unsafe_allow_html=True,
+    render_html(
+        "<div class='soft-divider'></div>"
+        "<div class='section-title'>Energy Validation (Assumptions)</div>"
+        "<div class='subtle'>Ranges validated by the Energy & Sustainability expert to keep the -25% trajectory realistic.</div>"
     )
     assumptions_df = pd.DataFrame([
         {
@@ -2608,62 +3170,37 @@ if page == "Dashboard":
             )
     else:
         st.caption("Energy assumptions document not found in project root.")
-    doc_texts = st.session_state.get("doc_texts", [])
     if doc_texts:
-        inputs = extract_workload_inputs("\n".join(doc_texts))
-        results = compute_workload_audit(inputs)
+        joined_docs, docs_hash = joined_doc_texts()
+        inputs, results = workload_audit_from_text(joined_docs, docs_hash)
         if "error" not in results:
             n_value = inputs.get("n_inferences")
             n_display = f"{int(n_value):,}" if n_value else "n/a"
-            decision = summarize_workload_decision(inputs, results)
-            recommendation = workload_recommendation(inputs, results)
+            decision_html, rec_html = workload_report_html(joined_docs, docs_hash)
             flags = workload_decision_flags(results)
             goal = st.session_state.get("business_goal", "Not specified")
             goal_line = business_goal_recommendation(goal, results)
-            rec_html = "<br>".join([line.replace("- ", "• ") for line in recommendation.splitlines()])
-            st.markdown("<div class='section-title'>AI Workload Audit</div>", unsafe_allow_html=True)
+            render_html("<div class='section-title'>AI Workload Audit</div>")
             st.markdown(
-                f"""
-                <div class='section'>
-                N = <b>{n_display}</b> inferences (total inferences in the scenario)<br>
-                GPU total time (h): <b>{results['gpu_time_h']:.2f}</b><br>
-                Edge total time (h): <b>{results['edge_time_h']:.2f}</b><br>
-                GPU total energy (kWh): <b>{results['gpu_energy_kwh']:.3f}</b><br>
-                Edge total energy (kWh): <b>{results['edge_energy_kwh']:.3f}</b><br>
-                GPU energy per inference (Wh): <b>{results['gpu_energy_per_inf_wh']:.6f}</b><br>
-                Edge energy per inference (Wh): <b>{results['edge_energy_per_inf_wh']:.6f}</b><br>
-                GPU cost (€): <b>{results['gpu_cost']:.2f}</b><br>
-                Edge cost (€): <b>{results['edge_cost']:.2f}</b>
-                <br><br><b>Decision:</b><br>{decision.replace("\n", "<br>")}<br><br>
-                <b>Business goal:</b><br>{goal_line}<br><br>
-                <b>Key indicators:</b><br>
-                <span class='badge badge-solid'>Fastest: {flags['fastest']}</span>
-                <span class='badge badge-solid'>Lowest energy: {flags['lowest_energy']}</span>
-                <span class='badge badge-solid'>Lowest cost: {flags['lowest_cost']}</span>
-                <br><br><b>Recommendation:</b><br>{rec_html}
-                </div>
-                """,
+                _WORKLOAD_AUDIT_TPL.format(
+                    n_display=n_display,
+                    # Costs are None when the document gives no €/hour or electricity price.
+                    gpu_cost_display=f"{results['gpu_cost']:.2f}" if results["gpu_cost"] is not None else "n/a",
+                    edge_cost_display=f"{results['edge_cost']:.2f}" if results["edge_cost"] is not None else "n/a",
+                    decision_html=decision_html,
+                    goal_line=goal_line,
+                    rec_html=rec_html,
+                    **results,
+                    **flags,
+                ),
                 unsafe_allow_html=True,
             )
-    st.markdown(
-        "<div class='footer'>GreenDC Audit Platform • Responsible by design • © GreenAI Systems</div>",
-        unsafe_allow_html=True,
-    )
+    render_html("<div class='footer'>GreenDC Audit Platform • Responsible by design • © GreenAI Systems</div>")
 
     if "assistant_visible" not in st.session_state:
         st.session_state.assistant_visible = True
     if st.session_state.assistant_visible:
-        st.markdown('<div id="assistant" class="section-title">GreenDC Audit AI</div>', unsafe_allow_html=True)
-        st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
-        with st.form("assistant_form", clear_on_submit=False):
-            question = st.text_area(
-                "Ask a question about your audit (e.g., how to reach -25% CO2?)",
-                height=90,
-                key="assistant_question",
-            )
-            submitted = st.form_submit_button("Ask Knowledge Assistant")
-        if submitted:
-            context = {
+        context = {
                 "it_energy_mwh": it_energy_mwh,
                 "total_energy_mwh": total_energy_mwh,
                 "carbon_factor": carbon_factor,
@@ -2674,106 +3211,27 @@ if page == "Dashboard":
                 "cooling_setpoint": cooling_setpoint,
                 "aisle_containment": aisle_containment,
                 "virtualization_level": virtualization_level,
-                "recommendations": recs_data,
                 "cooling_ratio": 100.0 * (1 - (1 / pue)) if pue > 0 else 0.0,
-                "doc_summaries": st.session_state.get("doc_summaries", []),
-                "doc_metrics": st.session_state.get("doc_metrics", {}),
-            }
-            rules = load_rules()
-            reply = ai_assistant_reply(question, context)
-            is_doc_query = is_document_question(question) or is_long_paste(question)
-            if (is_audit_question(question) or context.get("doc_metrics")) and not is_doc_query:
-                rules_block = rule_based_plan(context, rules)
-                reply += "\n\n" + rules_block
-            docs_used = "YES" if context.get("doc_summaries") else "NO"
-            reply += f"\n\nDocs used: {docs_used}"
-            if simulate_web and not is_doc_query:
-                reply += "\n\nSimulated web search: This is a mock summary based on best practices."
-            st.session_state.assistant_reply = reply
-        if "assistant_reply" in st.session_state:
-            st.markdown(f"<div class='section'>{st.session_state.assistant_reply}</div>", unsafe_allow_html=True)
-        st.caption("Offline assistant. Uses rules + local/HF knowledge only (no web scraping).")
-
-    st.markdown("<div class='section-title'>Document QA</div>", unsafe_allow_html=True)
-    st.markdown("<div class='soft-divider'></div>", unsafe_allow_html=True)
+                "doc_summaries": doc_summaries,
+                "doc_metrics": doc_metrics,
+        }
+        assistant_panel(context, simulate_web)
+    render_html("<div class='section-title'>Document QA</div><div class='soft-divider'></div>")
+    # Outside the fragment: the AI Workload Audit above also reads the goal,
+    # so changing it must rerun the whole page. The widget key keeps
+    # st.session_state["business_goal"] current from the start of that rerun.
     business_goal = st.selectbox(
         "Business goal (optional)",
         ["Not specified", "Minimum cost", "Minimum energy per inference", "Minimum latency"],
         index=0,
+        key="business_goal",
     )
-    st.session_state["business_goal"] = business_goal
-    doc_question = st.text_area(
-        "Ask a question about uploaded documents (e.g., extract latency or cost KPIs).",
-        height=90,
-        key="doc_question",
-    )
-    if st.button("Analyze Documents"):
-        docs = st.session_state.get("doc_texts", [])
-        combined = "\n".join(docs) + "\n" + doc_question
-        if not docs and not doc_question.strip():
-            st.session_state["doc_reply"] = "No document uploaded yet."
-        else:
-            inputs = extract_workload_inputs(combined)
-            results = compute_workload_audit(inputs)
-            if "error" in results:
-                if any(inputs.get(k) is not None for k in ["n_inferences", "gpu_power_w", "edge_power_w", "gpu_latency_ms", "edge_latency_ms"]):
-                    st.session_state["doc_reply"] = (
-                        "Document KPIs detected but incomplete. "
-                        + results["error"]
-                        + "\nExtracted values: "
-                        + ", ".join(f"{k}={v}" for k, v in inputs.items())
-                    )
-                else:
-                    st.session_state["doc_reply"] = (
-                        "This document is a Green IT audit scenario (not an AI workload benchmark). "
-                        "Use the main KPIs and Applied parameters above."
-                    )
-            else:
-                gpu_cost_line = (
-                    f"GPU cost (€): {results['gpu_cost']:.2f}"
-                    if results["gpu_cost"] is not None
-                    else "GPU cost (€): n/a"
-                )
-                edge_cost_line = (
-                    f"Edge cost (€): {results['edge_cost']:.2f}"
-                    if results["edge_cost"] is not None
-                    else "Edge cost (€): n/a"
-                )
-                decision = summarize_workload_decision(inputs, results)
-                recommendation = workload_recommendation(inputs, results)
-                goal_line = business_goal_recommendation(business_goal, results)
-                n_value = inputs.get("n_inferences")
-                n_display = f"{int(n_value):,}" if n_value else "n/a"
-                rec_html = "<br>".join([line.replace("- ", "• ") for line in recommendation.splitlines()])
-                st.session_state["doc_reply"] = (
-                    "<div class='section'>"
-                    "<b>AI Workload Audit (from documents)</b><br>"
-                    f"N = <b>{n_display}</b> inferences (total inferences in the scenario)<br>"
-                    f"GPU total time (h): <b>{results['gpu_time_h']:.2f}</b><br>"
-                    f"Edge total time (h): <b>{results['edge_time_h']:.2f}</b><br>"
-                    f"GPU total energy (kWh): <b>{results['gpu_energy_kwh']:.3f}</b><br>"
-                    f"Edge total energy (kWh): <b>{results['edge_energy_kwh']:.3f}</b><br>"
-                    f"GPU energy per inference (Wh): <b>{results['gpu_energy_per_inf_wh']:.6f}</b><br>"
-                    f"Edge energy per inference (Wh): <b>{results['edge_energy_per_inf_wh']:.6f}</b><br>"
-                    f"{gpu_cost_line}<br>"
-                    f"{edge_cost_line}"
-                    "<div class='soft-divider'></div>"
-                    "<b>Decision</b><br>"
-                    f"{decision.replace('\n', '<br>')}"
-                    "<div class='soft-divider'></div>"
-                    f"<b>Business goal</b><br>{goal_line}"
-                    "<div class='soft-divider'></div>"
-                    "<b>Recommendation</b><br>"
-                    f"{rec_html}"
-                    "</div>"
-                )
-    if st.session_state.get("doc_reply"):
-        st.markdown(st.session_state["doc_reply"], unsafe_allow_html=True)
+    doc_qa_panel(business_goal)
 
 if page == "About":
-    st.markdown("<div id='about' class='section-title'>About the Platform</div>", unsafe_allow_html=True)
-    st.markdown(
+    render_html(
         """
+        <div id="about" class="section-title">About the Platform</div>
         <div class="glass">
             <b>Mission:</b> Provide an audit-ready, measurable path to cut data center CO2 by 25%.
             <br><br>
@@ -2781,12 +3239,6 @@ if page == "About":
             <br><br>
             <b>Scope:</b> PUE, DCiE, CO2, recommendations, and scenario validation.
         </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    st.markdown("")
-    st.markdown(
-        """
         <div class="glass">
             <b>How it works:</b>
             <ol>
@@ -2796,12 +3248,6 @@ if page == "About":
                 <li>KPIs, recommendations, and simulation update in real time.</li>
             </ol>
         </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    st.markdown("")
-    st.markdown(
-        """
         <div class="glass">
             <b>Key features:</b>
             <ul>
@@ -2823,12 +3269,7 @@ if page == "About":
             <span class="badge badge-solid">Green Coding</span>
             <span class="badge badge-solid">Proportional Computing</span>
         </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    st.markdown("<div id='team' class='section-title'>Team</div>", unsafe_allow_html=True)
-    st.markdown(
-        """
+        <div id="team" class="section-title">Team</div>
         <div class="glass">
             <b>GreenAI Systems</b><br><br>
             Gémima ONDELE POUROU • Platform Architect & Frontend/Integration<br>
@@ -2837,6 +3278,5 @@ if page == "About":
             Nandaa BALASUNDARAM • Simulation & Scenario Analysis<br>
             Pierre Joël TAAFO • Documentation & QA
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
     )
@@ -0,0 +1,35 @@
+"""
+Unit tests for document metric extraction in the Streamlit frontend.
+"""
+
+import unittest
+import sys
+import os
+
+# The app runs as a script from frontend/; importing it executes the page in bare mode.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app
+
+
+class TestExtractMetricsFromText(unittest.TestCase):
+    """Test extract_metrics_from_text"""
+
+    def test_ascii_keywords(self):
+        metrics = app.extract_metrics_from_text("Total energy 1300 MWh, IT energy 780 MWh")
+        self.assertEqual(metrics["total_energy_mwh"], 1300.0)
+        self.assertEqual(metrics["it_energy_mwh"], 780.0)
+
+    def test_unicode_case_variants_do_not_crash(self):
+        """IGNORECASE matches "İT", "ıt", "ſervers"; these must map back to their metric"""
+        metrics = app.extract_metrics_from_text("İT energy: 780 MWh, ſervers: 320")
+        self.assertEqual(metrics["it_energy_mwh"], 780.0)
+        self.assertEqual(metrics["servers"], 320.0)
+
+        metrics = app.extract_metrics_from_text("ıt energy 780 MWh and coſt 2 € / 1,000,000 inferences")
+        self.assertEqual(metrics["it_energy_mwh"], 780.0)
+        self.assertEqual(metrics["cost_per_million"], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()